@@ -2,5 +2,6 @@
 
 from .wasapi_capture import WasapiCapture
 from .resampler import AudioResampler
+from .ring_buffer import SpscRingBuffer
 
-__all__ = ["WasapiCapture", "AudioResampler"]
+__all__ = ["WasapiCapture", "AudioResampler", "SpscRingBuffer"]
@@ -4,9 +4,15 @@
 任意のサンプルレート/チャンネル数から 16kHz/mono/16bit PCM への変換を行う。
 """
 
+import math
 import numpy as np
 from typing import Optional
-import resampy
+from scipy import signal
+
+try:
+    import soxr
+except ImportError:  # libsoxr が無い環境では scipy のポリフェーズ実装を使用
+    soxr = None
 
 
 class AudioResampler:
@@ -36,6 +42,24 @@ class AudioResampler:
         self.input_channels = input_channels
         self.input_dtype = input_dtype
         
+        # ストリーミングリサンプラー（フィルタ係数と内部状態をチャンク間で保持）
+        self._stream = None
+        if input_sample_rate != self.TARGET_SAMPLE_RATE:
+            if soxr is not None:
+                self._stream = soxr.ResampleStream(
+                    input_sample_rate,
+                    self.TARGET_SAMPLE_RATE,
+                    1,
+                    dtype=input_dtype,
+                    quality='HQ'
+                )
+            else:
+                self._stream = PolyphaseStream(
+                    input_sample_rate,
+                    self.TARGET_SAMPLE_RATE,
+                    dtype=input_dtype
+                )
+        
     def resample(self, audio_data: bytes) -> bytes:
         """
         音声データをリサンプリングする
@@ -46,9 +70,21 @@ class AudioResampler:
         Returns:
             16kHz/mono/16bit PCM のバイト列
         """
-        # バイト列を numpy 配列に変換
         samples = np.frombuffer(audio_data, dtype=self.input_dtype)
+        return self.resample_ndarray(samples).tobytes()
+        
+    def resample_ndarray(self, samples: np.ndarray) -> np.ndarray:
+        """
+        numpy 配列のままリサンプリングする
+        
+        バイト列との相互変換（frombuffer / tobytes）を省略したい呼び出し元向け。
         
+        Args:
+            samples: インターリーブされた入力サンプル（input_dtype）
+            
+        Returns:
+            16kHz/mono の int16 配列
+        """
         # ステレオの場合はモノラルに変換
         if self.input_channels > 1:
             samples = self._to_mono(samples)
@@ -61,7 +97,30 @@ class AudioResampler:
         if samples.dtype != self.TARGET_DTYPE:
             samples = self._convert_dtype(samples)
             
-        return samples.tobytes()
+        return samples
+    
+    def flush(self) -> bytes:
+        """
+        ストリーミングリサンプラー内に残っているサンプルを出力する
+        
+        連続した音声の終端で1回だけ呼び出す。呼び出し後は内部状態がリセットされる。
+        
+        Returns:
+            16kHz/mono/16bit PCM のバイト列
+        """
+        if self._stream is None:
+            return b""
+            
+        tail = self._stream.resample_chunk(np.zeros(0, dtype=self.input_dtype), last=True)
+        self._stream.clear()
+        if tail.dtype != self.TARGET_DTYPE:
+            tail = self._convert_dtype(tail)
+        return tail.tobytes()
+        
+    def reset(self) -> None:
+        """ストリーミングリサンプラーの内部状態をリセット"""
+        if self._stream is not None:
+            self._stream.clear()
     
     def _to_mono(self, samples: np.ndarray) -> np.ndarray:
         """
@@ -75,8 +134,19 @@ class AudioResampler:
         """
         # インターリーブされたサンプルをリシェイプ
         samples = samples.reshape(-1, self.input_channels)
-        # チャンネルの平均を取る
-        mono = samples.mean(axis=1)
+        
+        # int16 ステレオは整数演算のみで平均（float への変換なし）
+        if self.input_channels == 2 and self.input_dtype == np.int16:
+            left = samples[:, 0]
+            right = samples[:, 1]
+            return (left >> 1) + (right >> 1) + (left & right & 1)
+            
+        # float 入力は入力と同じ精度で平均を取る（float64 を経由しない）
+        if samples.dtype.kind == "f":
+            return samples.mean(axis=1, dtype=samples.dtype)
+            
+        # 整数入力は float32 で平均を取ってから入力データ型に戻す
+        mono = samples.mean(axis=1, dtype=np.float32)
         return mono.astype(self.input_dtype)
     
     def _resample_audio(self, samples: np.ndarray) -> np.ndarray:
@@ -87,29 +157,10 @@ class AudioResampler:
             samples: 入力サンプル
             
         Returns:
-            リサンプリングされたサンプル
-        """
-        # float32 に変換（resampy の要件）
-        samples_float = samples.astype(np.float32)
-        
-        # 正規化
-        if self.input_dtype == np.int16:
-            samples_float = samples_float / 32768.0
-        elif self.input_dtype == np.int32:
-            samples_float = samples_float / 2147483648.0
-            
-        # リサンプリング
-        resampled = resampy.resample(
-            samples_float,
-            self.input_sample_rate,
-            self.TARGET_SAMPLE_RATE,
-            filter='kaiser_fast'
-        )
-        
-        # int16 に戻す
-        resampled = (resampled * 32767).clip(-32768, 32767).astype(np.int16)
-        
-        return resampled
+            リサンプリングされたサンプル（入力と同じデータ型）
+        """
+        # 入力データ型のまま1パスで変換（正規化・逆正規化は不要）
+        return self._stream.resample_chunk(samples, last=False)
     
     def _convert_dtype(self, samples: np.ndarray) -> np.ndarray:
         """
@@ -129,6 +180,178 @@ class AudioResampler:
             return samples.astype(np.int16)
 
 
+class Int16StereoResampler(AudioResampler):
+    """
+    int16 ステレオ専用リサンプラー
+    
+    WASAPI の既定フォーマット（48kHz/44.1kHz・ステレオ・int16）向けに、
+    整数ダウンミックス（_to_mono）→ ストリーミングリサンプラー（int16 入出力）を直結する。
+    サンプルレート変換の有無による分岐と dtype 変換を省略する。
+    """
+    
+    SUPPORTED_SAMPLE_RATES = (48000, 44100)
+    
+    def __init__(self, input_sample_rate: int = 48000):
+        """
+        Args:
+            input_sample_rate: 入力サンプルレート (Hz)。SUPPORTED_SAMPLE_RATES のいずれか。
+        """
+        if input_sample_rate not in self.SUPPORTED_SAMPLE_RATES:
+            raise ValueError(f"未対応のサンプルレート: {input_sample_rate}")
+        super().__init__(
+            input_sample_rate=input_sample_rate,
+            input_channels=2,
+            input_dtype=np.int16
+        )
+        
+    def resample_ndarray(self, samples: np.ndarray) -> np.ndarray:
+        """
+        numpy 配列のままリサンプリングする
+        
+        Args:
+            samples: インターリーブされた int16 ステレオサンプル
+            
+        Returns:
+            16kHz/mono の int16 配列
+        """
+        # ダウンミックスは基底クラスの整数演算パスを共有する
+        return self._stream.resample_chunk(self._to_mono(samples), last=False)
+
+
+class PolyphaseStream:
+    """
+    固定比率ポリフェーズ FIR ストリーミングリサンプラー
+    
+    入出力レートの比を L/M（既約分数）に分解し、カイザー窓 FIR を初期化時に1回だけ設計する。
+    各チャンクは scipy.signal.upfirdn で処理するため、ゼロ挿入された位相の乗算は行われない。
+    soxr.ResampleStream と同じインターフェース（resample_chunk / clear）を持つ。
+    """
+    
+    TAPS_PER_PHASE = 32
+    KAISER_BETA = 8.6
+    INITIAL_CAPACITY = 8192  # 履歴以外に事前確保する入力サンプル数
+    
+    def __init__(
+        self,
+        input_sample_rate: int,
+        output_sample_rate: int,
+        dtype: np.dtype = np.float32
+    ):
+        """
+        Args:
+            input_sample_rate: 入力サンプルレート (Hz)
+            output_sample_rate: 出力サンプルレート (Hz)
+            dtype: 入出力データ型（内部演算は float32）
+        """
+        self.dtype = np.dtype(dtype)
+        gcd = math.gcd(input_sample_rate, output_sample_rate)
+        self.up = output_sample_rate // gcd
+        self.down = input_sample_rate // gcd
+        
+        # アンチエイリアス FIR（アップサンプル後のゲイン補正として L 倍）
+        n = max(self.up, self.down)
+        self._fir = signal.firwin(
+            self.TAPS_PER_PHASE * n + 1,
+            1.0 / n,
+            window=('kaiser', self.KAISER_BETA)
+        ).astype(np.float32) * self.up
+        
+        # 次の出力に必要な入力履歴長と、群遅延（出力サンプル数）
+        self._history_len = (len(self._fir) - 1) // self.up + 2
+        self._delay = round((len(self._fir) - 1) / 2 / self.down)
+        
+        # 入力履歴バッファ（事前確保し、足りない場合のみ拡張する）
+        self._buffer = np.zeros(self._history_len + self.INITIAL_CAPACITY, dtype=np.float32)
+        self.clear()
+        
+    def clear(self) -> None:
+        """内部状態をリセット（確保済みのバッファは再利用する）"""
+        self._buffer_len = 0
+        self._buffer_start = 0  # バッファ先頭の入力インデックス（常に down の倍数）
+        self._input_count = 0
+        self._next_output = 0
+        
+    def _reserve(self, length: int) -> None:
+        """
+        バッファ容量を確保する
+        
+        Args:
+            length: 必要な有効サンプル数
+        """
+        if length > len(self._buffer):
+            grown = np.zeros(max(length, 2 * len(self._buffer)), dtype=np.float32)
+            grown[:self._buffer_len] = self._buffer[:self._buffer_len]
+            self._buffer = grown
+            
+    def resample_chunk(self, x: np.ndarray, last: bool = False) -> np.ndarray:
+        """
+        チャンクをリサンプリング
+        
+        Args:
+            x: モノラルサンプル
+            last: 連続した音声の最終チャンクの場合 True（残りを出力して状態をリセット）
+            
+        Returns:
+            リサンプリングされたサンプル（dtype で指定した型）
+        """
+        n = len(x)
+        if n > 0:
+            # 確保済みバッファへ直接書き込む（float32 への変換も同時に行う）
+            self._reserve(self._buffer_len + n)
+            self._buffer[self._buffer_len:self._buffer_len + n] = x
+            self._buffer_len += n
+            self._input_count += n
+            
+        available = self._input_count
+        last_output = ((available - 1) * self.up) // self.down
+        
+        if last:
+            # 群遅延分を押し出すためにゼロを補う
+            expected = -(-self._input_count * self.up // self.down)
+            last_output = self._delay + expected - 1
+            needed = (last_output * self.down) // self.up + 1
+            if needed > available:
+                pad = needed - available
+                self._reserve(self._buffer_len + pad)
+                self._buffer[self._buffer_len:self._buffer_len + pad] = 0.0
+                self._buffer_len += pad
+                
+        first_output = self._next_output
+        if last_output < first_output:
+            out = np.zeros(0, dtype=np.float32)
+        else:
+            y = signal.upfirdn(
+                self._fir, self._buffer[:self._buffer_len], up=self.up, down=self.down
+            )
+            base = self._buffer_start * self.up // self.down
+            out = y[first_output - base:last_output - base + 1]
+            self._next_output = last_output + 1
+            
+        # 群遅延分の先頭出力を捨てる
+        if first_output < self._delay:
+            out = out[self._delay - first_output:]
+            
+        if last:
+            self.clear()
+        else:
+            start = max(0, self._input_count - self._history_len)
+            start -= start % self.down
+            if start > self._buffer_start:
+                # 必要な履歴だけをバッファ先頭へ詰める（再確保なし）
+                offset = start - self._buffer_start
+                keep = self._buffer_len - offset
+                self._buffer[:keep] = self._buffer[offset:self._buffer_len]
+                self._buffer_len = keep
+                self._buffer_start = start
+                
+        # upfirdn の一時出力上で丸め・クリップし、出力配列の確保は1回だけにする
+        if self.dtype.kind in "iu":
+            info = np.iinfo(self.dtype)
+            np.rint(out, out=out)
+            np.clip(out, info.min, info.max, out=out)
+        return out.astype(self.dtype)
+
+
 class PassthroughResampler:
     """
     パススルーリサンプラー
@@ -144,6 +367,17 @@ class PassthroughResampler:
     def resample(self, audio_data: bytes) -> bytes:
         """変換なしでそのまま返す"""
         return audio_data
+        
+    def resample_ndarray(self, samples: np.ndarray) -> np.ndarray:
+        """変換なしでそのまま返す"""
+        return samples
+        
+    def flush(self) -> bytes:
+        """内部バッファを持たないため常に空"""
+        return b""
+        
+    def reset(self) -> None:
+        """内部状態を持たないため何もしない"""
 
 
 def create_resampler(
@@ -154,7 +388,8 @@ def create_resampler(
     """
     適切なリサンプラーを作成するファクトリ関数
     
-    入力がすでに目標フォーマットの場合は PassthroughResampler を返す。
+    入力がすでに目標フォーマットの場合は PassthroughResampler を、
+    48kHz/44.1kHz・ステレオ・int16 の場合は Int16StereoResampler を返す。
     
     Args:
         input_sample_rate: 入力サンプルレート
@@ -168,6 +403,10 @@ def create_resampler(
         input_channels == 1 and 
         input_dtype == np.int16):
         return PassthroughResampler()
+    elif (input_sample_rate in Int16StereoResampler.SUPPORTED_SAMPLE_RATES and
+          input_channels == 2 and
+          input_dtype == np.int16):
+        return Int16StereoResampler(input_sample_rate=input_sample_rate)
     else:
         return AudioResampler(
             input_sample_rate=input_sample_rate,
@@ -0,0 +1,153 @@
+"""
+SPSC リングバッファモジュール
+
+オーディオコールバック（単一プロデューサ）と処理スレッド（単一コンシューマ）の間で
+音声チャンクを受け渡すための固定長リングバッファ。
+"""
+
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+
+class SpscRingBuffer:
+    """
+    単一プロデューサ/単一コンシューマのリングバッファ
+    
+    固定サイズの int16 スロットを事前確保し、push はスロットへのコピーと
+    書き込みインデックスの更新のみを行う（ロック取得・メモリ確保なし）。
+    インデックスの読み書きは GIL 下でアトミックなため、head はプロデューサのみ、
+    tail はコンシューマのみが更新する。
+    
+    Usage:
+        ring = SpscRingBuffer(slots=64, slot_size=1024)
+        ring.push(samples)          # オーディオスレッド
+        chunk = ring.pop(timeout=1) # 処理スレッド
+    """
+    
+    def __init__(self, slots: int = 64, slot_size: int = 1024, dtype: np.dtype = np.int16):
+        """
+        Args:
+            slots: スロット数
+            slot_size: 1スロットあたりの最大サンプル数
+            dtype: サンプルのデータ型
+        """
+        self.slots = slots
+        self.slot_size = slot_size
+        
+        self._data = np.zeros((slots, slot_size), dtype=dtype)
+        self._lengths = [0] * slots
+        self._head = 0  # 書き込み済みチャンク数（プロデューサのみ更新）
+        self._tail = 0  # 読み出し済みチャンク数（コンシューマのみ更新）
+        self._overruns = 0
+        
+        # コンシューマが待機中の場合のみプロデューサが起こす
+        self._reader_waiting = False
+        self._woken = False
+        self._data_ready = threading.Event()
+        
+    def push(self, samples: np.ndarray) -> bool:
+        """
+        チャンクを書き込む（プロデューサ側）
+        
+        Args:
+            samples: 音声サンプル（slot_size 以下）
+            
+        Returns:
+            True if 書き込み成功。バッファが満杯の場合は破棄して False。
+        """
+        head = self._head
+        if head - self._tail >= self.slots:
+            self._overruns += 1
+            return False
+            
+        index = head % self.slots
+        n = len(samples)
+        np.copyto(self._data[index, :n], samples)
+        self._lengths[index] = n
+        
+        # スロットを書き終えてから公開する
+        self._head = head + 1
+        if self._reader_waiting:
+            self._data_ready.set()
+        return True
+        
+    def pop(self, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """
+        チャンクを読み出す（コンシューマ側）
+        
+        Args:
+            timeout: タイムアウト秒数。None の場合はブロック。0 の場合は待機しない。
+            
+        Returns:
+            音声サンプルのコピー。タイムアウト時は None。
+        """
+        chunk = self.peek(timeout)
+        if chunk is None:
+            return None
+        chunk = chunk.copy()
+        self.release()
+        return chunk
+        
+    def peek(self, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """
+        先頭のチャンクをコピーせずに参照する（コンシューマ側）
+        
+        返すのはスロット上のビューで、release() を呼ぶまでプロデューサに上書きされない。
+        
+        Args:
+            timeout: タイムアウト秒数。None の場合はブロック。0 の場合は待機しない。
+            
+        Returns:
+            音声サンプルのビュー。タイムアウト時は None。
+        """
+        if self._tail == self._head:
+            if timeout == 0:
+                return None
+            deadline = None if timeout is None else time.monotonic() + timeout
+            self._reader_waiting = True
+            try:
+                while self._tail == self._head and not self._woken:
+                    remaining = None
+                    if deadline is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                    self._data_ready.wait(remaining)
+                    # 取りこぼし防止のため、クリア後に必ずインデックスを再確認する
+                    self._data_ready.clear()
+            finally:
+                self._reader_waiting = False
+            if self._tail == self._head:
+                # wake() による起床は None を返したときにだけ消費する
+                # （未読チャンクが残っている間は起床要求を保持する）
+                self._woken = False
+                return None
+                
+        index = self._tail % self.slots
+        return self._data[index, :self._lengths[index]]
+        
+    def release(self) -> None:
+        """peek() で参照した先頭のチャンクを解放し、スロットをプロデューサに返す"""
+        if self._tail != self._head:
+            self._tail += 1
+            
+    def clear(self) -> None:
+        """未読のチャンクをすべて破棄する（コンシューマ側）"""
+        self._tail = self._head
+        
+    def wake(self) -> None:
+        """待機中のコンシューマを起こす（停止時など、pop は None を返す）"""
+        self._woken = True
+        self._data_ready.set()
+        
+    def __len__(self) -> int:
+        """未読のチャンク数"""
+        return self._head - self._tail
+        
+    @property
+    def overruns(self) -> int:
+        """満杯により破棄したチャンク数"""
+        return self._overruns
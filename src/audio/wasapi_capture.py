@@ -4,14 +4,18 @@ WASAPI マイク入力モジュール
 Windows Audio Session API (WASAPI) を使用してマイクから音声データを取得する。
 """
 
+import logging
 import threading
-import queue
+import time
 from typing import Optional, Callable, List, Dict, Any
 from dataclasses import dataclass
 
 import pyaudiowpatch as pyaudio
 import numpy as np
 
+from .ring_buffer import SpscRingBuffer
+
+logger = logging.getLogger(__name__)
 
 @dataclass
 class AudioDevice:
@@ -40,6 +44,8 @@ class WasapiCapture:
     TARGET_CHANNELS = 1
     TARGET_FORMAT = pyaudio.paInt16
     CHUNK_SIZE = 1024  # サンプル数
+    QUEUE_SLOTS = 64  # 内部リングバッファのチャンク数（約 4 秒分）
+    OVERRUN_LOG_INTERVAL_S = 1.0  # バッファ溢れの警告を出す最短間隔（秒）
     
     def __init__(self, device_index: Optional[int] = None):
         """
@@ -50,9 +56,13 @@ class WasapiCapture:
         self._stream: Optional[pyaudio.Stream] = None
         self._device_index = device_index
         self._is_recording = False
-        self._audio_queue: queue.Queue[bytes] = queue.Queue()
-        self._callback: Optional[Callable[[bytes], None]] = None
+        self._audio_queue = SpscRingBuffer(slots=self.QUEUE_SLOTS, slot_size=self.CHUNK_SIZE)
+        self._callback: Optional[Callable[[np.ndarray], None]] = None
+        self._worker: Optional[threading.Thread] = None
+        self._draining = False
         self._lock = threading.Lock()
+        self._overruns_reported = 0  # 警告済みのバッファ溢れ回数
+        self._overrun_logged_at = 0.0  # 最後に警告した時刻（time.monotonic()）
         
     def __enter__(self):
         self._init_pyaudio()
@@ -127,19 +137,70 @@ class WasapiCapture:
     def _audio_callback(self, in_data, frame_count, time_info, status):
         """PyAudio コールバック関数"""
         if self._is_recording:
-            if self._callback:
-                self._callback(in_data)
-            else:
-                self._audio_queue.put(in_data)
+            # in_data は PyAudio がコピー済みの bytes なので、そのまま参照するビューで十分
+            samples = np.frombuffer(in_data, dtype=np.int16)
+            # 事前確保したスロットへコピーするだけ（ロック・メモリ確保・コールバック呼び出しなし）
+            # コールバックはワーカースレッド（_drain）から呼び出す
+            self._audio_queue.push(samples)
         return (None, pyaudio.paContinue)
     
-    def start(self, callback: Optional[Callable[[bytes], None]] = None) -> None:
+    def _drain(self) -> None:
+        """
+        リングバッファからチャンクを取り出してコールバックを呼び出す（ワーカースレッド）
+        
+        コールバックにはスロット上のビューをコピーせずに渡し、戻った時点でスロットを解放する。
+        """
+        ring = self._audio_queue
+        while True:
+            chunk = ring.peek()
+            if chunk is None:
+                # wake() で起こされた: 停止要求なら終了（残りはすべて処理済み）
+                if not self._draining:
+                    break
+                continue
+                
+            callback = self._callback
+            try:
+                if callback is not None:
+                    callback(chunk)
+            except Exception:
+                logger.exception("音声コールバックでエラーが発生しました")
+            finally:
+                ring.release()
+            self._report_overruns()
+            
+    def _report_overruns(self, force: bool = False) -> None:
+        """
+        前回の警告以降にリングバッファが溢れて破棄したチャンクがあれば警告する
+        
+        オーディオスレッドではログを出せないため、ワーカースレッドと stop() から呼び出す。
+        
+        Args:
+            force: True の場合は間隔制限を無視する（停止時の最終報告用）
+        """
+        overruns = self._audio_queue.overruns
+        dropped = overruns - self._overruns_reported
+        if dropped == 0:
+            return
+        now = time.monotonic()
+        if not force and now - self._overrun_logged_at < self.OVERRUN_LOG_INTERVAL_S:
+            return
+        logger.warning(
+            "音声バッファが満杯のため %d チャンク（%.0f ms）を破棄しました",
+            dropped, dropped * self.CHUNK_SIZE * 1000 / self.TARGET_SAMPLE_RATE
+        )
+        self._overruns_reported = overruns
+        self._overrun_logged_at = now
+        
+    def start(self, callback: Optional[Callable[[np.ndarray], None]] = None) -> None:
         """
         録音を開始する
         
         Args:
-            callback: 音声データを受け取るコールバック関数。
+            callback: 音声データ（16kHz/mono の int16 配列）を受け取るコールバック関数。
                       None の場合は内部キューにデータを蓄積。
+                      配列は内部バッファのビューで、コールバックから戻ると再利用される。
+                      保持する場合はコピーすること。
         """
         with self._lock:
             if self._is_recording:
@@ -167,6 +228,12 @@ class WasapiCapture:
                 stream_callback=self._audio_callback
             )
             
+            # コールバック指定時はワーカースレッドで配信する
+            if callback is not None:
+                self._draining = True
+                self._worker = threading.Thread(target=self._drain, daemon=True)
+                self._worker.start()
+                
             self._is_recording = True
             self._stream.start_stream()
             
@@ -180,30 +247,40 @@ class WasapiCapture:
                 self._stream.close()
                 self._stream = None
                 
+            # ストリーム停止後に残ったチャンクを配信し終えてからワーカーを終了する
+            worker = self._worker
+            if worker is not None:
+                self._draining = False
+                self._audio_queue.wake()
+                if worker is not threading.current_thread():
+                    worker.join()
+                self._worker = None
+                
+            self._report_overruns(force=True)
             self._callback = None
             
-    def read(self, timeout: Optional[float] = None) -> Optional[bytes]:
+    def read(self, timeout: Optional[float] = None) -> Optional[np.ndarray]:
         """
         キューから音声データを読み取る
         
+        start() にコールバックを指定していない場合のみ使用する。
+        
         Args:
             timeout: タイムアウト秒数。None の場合はブロック。
             
         Returns:
-            音声データ。タイムアウト時は None。
+            音声データ（int16 配列）。タイムアウト時は None。
         """
-        try:
-            return self._audio_queue.get(timeout=timeout)
-        except queue.Empty:
-            return None
+        return self._audio_queue.pop(timeout=timeout)
             
     def clear_queue(self) -> None:
-        """キューをクリアする"""
-        while not self._audio_queue.empty():
-            try:
-                self._audio_queue.get_nowait()
-            except queue.Empty:
-                break
+        """
+        キューをクリアする
+        
+        読み出し位置を書き込み位置に揃えるだけなので、未読チャンク数によらず O(1)。
+        read() と同じくコンシューマ側から呼び出す。
+        """
+        self._audio_queue.clear()
                 
     @property
     def is_recording(self) -> bool:
@@ -2,6 +2,7 @@
 
 from .global_hotkey import (
     GlobalHotkeyManager,
+    PynputHotkeyManager,
     RecordingToggle,
     HotkeyConfig,
     VK,
@@ -11,6 +12,7 @@ from .global_hotkey import (
 
 __all__ = [
     "GlobalHotkeyManager",
+    "PynputHotkeyManager",
     "RecordingToggle",
     "HotkeyConfig",
     "VK",
@@ -1,12 +1,14 @@
 """
 グローバルホットキーモジュール
 
-pynput を使用してシステム全体で有効なホットキーを登録し、
+Win32 RegisterHotKey を使用してシステム全体で有効なホットキーを登録し、
 録音の開始/停止をトグル制御する。
 """
 
+import ctypes
+from ctypes import wintypes
 import threading
-from typing import Optional, Callable, Set
+from typing import Optional, Callable
 from dataclasses import dataclass
 from enum import Enum
 import logging
@@ -49,6 +51,9 @@ class VK:
     F10 = 0x79
     F11 = 0x7A
     F12 = 0x7B
+    SHIFT = 0x10
+    CONTROL = 0x11
+    MENU = 0x12  # Alt
 
 
 class MOD:
@@ -60,6 +65,53 @@ class MOD:
     NOREPEAT = 0x4000
 
 
+# Win32 定数
+WM_HOTKEY = 0x0312
+WM_QUIT = 0x0012
+WM_APP = 0x8000
+_WM_APP_SYNC = WM_APP + 1  # 登録内容の再同期要求（開始後の register/unregister）
+PM_NOREMOVE = 0x0000
+
+
+# 仮想キーコード → pynput キーの対応表（呼び出しごとに辞書を作らないようモジュール定数にする）
+_VK_TO_PYNPUT = {
+    VK.F1: keyboard.Key.f1,
+    VK.F2: keyboard.Key.f2,
+    VK.F3: keyboard.Key.f3,
+    VK.F4: keyboard.Key.f4,
+    VK.F5: keyboard.Key.f5,
+    VK.F6: keyboard.Key.f6,
+    VK.F7: keyboard.Key.f7,
+    VK.F8: keyboard.Key.f8,
+    VK.F9: keyboard.Key.f9,
+    VK.F10: keyboard.Key.f10,
+    VK.F11: keyboard.Key.f11,
+    VK.F12: keyboard.Key.f12,
+}
+
+# 仮想キーコード → 表示名
+_VK_NAMES = {
+    VK.F1: "F1", VK.F2: "F2", VK.F3: "F3", VK.F4: "F4",
+    VK.F5: "F5", VK.F6: "F6", VK.F7: "F7", VK.F8: "F8",
+    VK.F9: "F9", VK.F10: "F10", VK.F11: "F11", VK.F12: "F12",
+}
+
+# モディファイアキー → MOD ビット（押下中のモディファイアを1つの整数で追跡する）
+_MODIFIER_BITS = {
+    keyboard.Key.ctrl_l: MOD.CONTROL,
+    keyboard.Key.ctrl_r: MOD.CONTROL,
+    keyboard.Key.alt_l: MOD.ALT,
+    keyboard.Key.alt_r: MOD.ALT,
+    keyboard.Key.shift_l: MOD.SHIFT,
+    keyboard.Key.shift_r: MOD.SHIFT,
+    keyboard.Key.cmd_l: MOD.WIN,
+    keyboard.Key.cmd_r: MOD.WIN,
+}
+
+# 照合に使うモディファイアビット（NOREPEAT などは除く）
+_MODIFIER_MASK = MOD.CONTROL | MOD.ALT | MOD.SHIFT | MOD.WIN
+
+
 @dataclass
 class HotkeyConfig:
     """ホットキー設定"""
@@ -86,44 +138,212 @@ class HotkeyConfig:
         
     def _get_key_name(self) -> str:
         """キー名を取得"""
-        key_names = {
-            VK.F1: "F1", VK.F2: "F2", VK.F3: "F3", VK.F4: "F4",
-            VK.F5: "F5", VK.F6: "F6", VK.F7: "F7", VK.F8: "F8",
-            VK.F9: "F9", VK.F10: "F10", VK.F11: "F11", VK.F12: "F12",
-        }
-        return key_names.get(self.key, f"0x{self.key:02X}")
+        return _VK_NAMES.get(self.key, f"0x{self.key:02X}")
     
     def to_pynput_key(self) -> keyboard.Key:
         """pynput のキーに変換"""
-        mapping = {
-            VK.F1: keyboard.Key.f1,
-            VK.F2: keyboard.Key.f2,
-            VK.F3: keyboard.Key.f3,
-            VK.F4: keyboard.Key.f4,
-            VK.F5: keyboard.Key.f5,
-            VK.F6: keyboard.Key.f6,
-            VK.F7: keyboard.Key.f7,
-            VK.F8: keyboard.Key.f8,
-            VK.F9: keyboard.Key.f9,
-            VK.F10: keyboard.Key.f10,
-            VK.F11: keyboard.Key.f11,
-            VK.F12: keyboard.Key.f12,
-        }
-        return mapping.get(self.key, keyboard.Key.f8)
+        return _VK_TO_PYNPUT.get(self.key, keyboard.Key.f8)
 
 
 class GlobalHotkeyManager:
+    """
+    グローバルホットキーマネージャー（Win32 RegisterHotKey ベース）
+    
+    キーの組み合わせの判定は Windows が行うため、登録したホットキーが押されたときだけ
+    専用スレッドが起床する（通常のキー入力ごとに Python は実行されない）。
+    RegisterHotKey はスレッドのメッセージキューに紐づくため、登録・解除・メッセージ処理は
+    すべて専用スレッド上で行う。
+    """
+    
+    def __init__(self):
+        self._hotkeys: dict[int, tuple[HotkeyConfig, Callable]] = {}
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._thread_id = 0
+        self._ready = threading.Event()
+        self._registered_ok = False  # メッセージスレッドが書き込む登録結果
+        self._user32 = None
+        self._kernel32 = None
+        
+    def register(
+        self,
+        hotkey_id: int,
+        config: HotkeyConfig,
+        callback: Callable[[], None]
+    ) -> bool:
+        """
+        ホットキーを登録
+        
+        開始前に登録した場合は start() 時に、開始後の場合はメッセージスレッド上で
+        RegisterHotKey が呼ばれる。
+        """
+        self._hotkeys[hotkey_id] = (config, callback)
+        logger.info(f"ホットキー登録: ID={hotkey_id}, キー={config}")
+        self._request_sync()
+        return True
+        
+    def unregister(self, hotkey_id: int) -> bool:
+        """ホットキーを解除"""
+        if hotkey_id in self._hotkeys:
+            del self._hotkeys[hotkey_id]
+            self._request_sync()
+            return True
+        return False
+        
+    def _request_sync(self) -> None:
+        """実行中であればメッセージスレッドに登録内容の再同期を要求する"""
+        if self._running and self._thread_id:
+            self._user32.PostThreadMessageW(self._thread_id, _WM_APP_SYNC, 0, 0)
+            
+    def _sync_registrations(self, registered: dict[int, HotkeyConfig]) -> bool:
+        """
+        RegisterHotKey の登録状態を self._hotkeys に合わせる（メッセージスレッド専用）
+        
+        Args:
+            registered: 現在 Windows に登録済みの ID と設定（呼び出し内で更新される）
+            
+        Returns:
+            すべてのホットキーを登録できた場合 True
+        """
+        ok = True
+        hotkeys = dict(self._hotkeys)
+        for hotkey_id, config in list(registered.items()):
+            entry = hotkeys.get(hotkey_id)
+            if entry is None or entry[0] is not config:
+                self._user32.UnregisterHotKey(None, hotkey_id)
+                del registered[hotkey_id]
+                
+        for hotkey_id, (config, _) in hotkeys.items():
+            if hotkey_id in registered:
+                continue
+            # 押しっぱなしによる自動リピートで WM_HOTKEY が連続しないよう NOREPEAT を付ける
+            modifiers = config.modifiers | MOD.NOREPEAT
+            if self._user32.RegisterHotKey(None, hotkey_id, modifiers, config.key):
+                registered[hotkey_id] = config
+            else:
+                ok = False
+                error = ctypes.get_last_error()
+                logger.error(f"ホットキー登録失敗: ID={hotkey_id}, キー={config}, エラー={error}")
+        return ok
+                
+    def _dispatch(self, hotkey_id: int) -> None:
+        """WM_HOTKEY に対応するコールバックを呼び出す"""
+        entry = self._hotkeys.get(hotkey_id)
+        if entry is None:
+            return
+        config, callback = entry
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("ホットキー検出: %s", config)
+        try:
+            callback()
+        except Exception as e:
+            logger.error(f"ホットキーコールバックエラー: {e}")
+            
+    def _message_loop(self) -> None:
+        """ホットキーメッセージループ（専用スレッド）"""
+        user32 = self._user32
+        msg = wintypes.MSG()
+        registered: dict[int, HotkeyConfig] = {}
+        
+        try:
+            # メッセージキューを作成してからスレッド ID を公開する
+            user32.PeekMessageW(ctypes.byref(msg), None, 0, 0, PM_NOREMOVE)
+            self._thread_id = self._kernel32.GetCurrentThreadId()
+            self._registered_ok = self._sync_registrations(registered)
+        except Exception as e:
+            logger.error(f"ホットキースレッド初期化エラー: {e}")
+            self._thread_id = 0
+            return
+        finally:
+            # 初期化に失敗しても start() を待たせ続けない
+            self._ready.set()
+            
+        try:
+            # 登録に失敗した（start() が停止させる）か、初期化待ちがタイムアウトして
+            # start() 側が停止済みなら、ループに入らず登録を解除して終わる
+            if not self._registered_ok or not self._running:
+                return
+            # メッセージが来るまでカーネル内でブロックする（WM_QUIT で 0、エラーで -1）
+            while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+                if msg.message == WM_HOTKEY:
+                    self._dispatch(msg.wParam)
+                elif msg.message == _WM_APP_SYNC:
+                    self._sync_registrations(registered)
+        finally:
+            for hotkey_id in registered:
+                user32.UnregisterHotKey(None, hotkey_id)
+            self._thread_id = 0
+            
+    def start(self, timeout: float = 5.0) -> bool:
+        """
+        ホットキーのメッセージスレッドを開始
+        
+        Args:
+            timeout: メッセージスレッドの初期化（ホットキー登録）を待つ秒数
+            
+        Returns:
+            すべてのホットキーを登録できた場合 True。スレッドが初期化に失敗した・
+            応答しない・登録に失敗した場合はスレッドを停止して False
+        """
+        if self._running:
+            return True
+            
+        self._user32 = ctypes.WinDLL("user32", use_last_error=True)
+        self._kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+        self._user32.GetMessageW.restype = wintypes.BOOL
+        
+        self._running = True
+        self._registered_ok = False
+        self._ready.clear()
+        self._thread = threading.Thread(target=self._message_loop, daemon=True)
+        self._thread.start()
+        
+        if not self._ready.wait(timeout):
+            logger.error("ホットキースレッドが応答しません")
+        elif not self._thread.is_alive() or not self._registered_ok:
+            logger.error("ホットキーを登録できませんでした")
+        else:
+            logger.info("ホットキーリスナー開始")
+            return True
+            
+        self.stop()
+        return False
+        
+    def stop(self) -> None:
+        """ホットキーのメッセージスレッドを停止"""
+        if not self._running:
+            return
+            
+        self._running = False
+        # WM_QUIT で GetMessageW のブロックを解いてループを終了させる
+        if self._thread_id:
+            self._user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1.0)
+        self._thread = None
+        logger.info("ホットキーリスナー停止")
+        
+    @property
+    def is_running(self) -> bool:
+        """実行中かどうか"""
+        return self._running
+
+
+class PynputHotkeyManager:
     """
     グローバルホットキーマネージャー（pynput ベース）
     
     pynput を使用してシステム全体で有効なホットキーを登録・管理する。
+    キーボードフックで全キー入力を受け取るため、Win32 API が使えない環境向け。
     """
     
     def __init__(self):
         self._hotkeys: dict[int, tuple[HotkeyConfig, Callable]] = {}
+        # pynput キー → {hotkey_id: (config, callback, モディファイアマスク)}（キー押下時の O(1) 検索用）
+        self._by_key: dict[keyboard.Key, dict[int, tuple[HotkeyConfig, Callable, int]]] = {}
         self._running = False
         self._listener: Optional[keyboard.Listener] = None
-        self._pressed_modifiers: Set[keyboard.Key] = set()
+        self._mod_mask = 0  # 押下中のモディファイア（MOD.* のビット和）
         
     def register(
         self,
@@ -132,75 +352,58 @@ class GlobalHotkeyManager:
         callback: Callable[[], None]
     ) -> bool:
         """ホットキーを登録"""
+        self.unregister(hotkey_id)
         self._hotkeys[hotkey_id] = (config, callback)
+        # pynput キーへの変換は登録時に1回だけ行う
+        pynput_key = config.to_pynput_key()
+        mask = config.modifiers & _MODIFIER_MASK
+        self._by_key.setdefault(pynput_key, {})[hotkey_id] = (config, callback, mask)
         logger.info(f"ホットキー登録: ID={hotkey_id}, キー={config}")
         return True
         
     def unregister(self, hotkey_id: int) -> bool:
         """ホットキーを解除"""
         if hotkey_id in self._hotkeys:
-            del self._hotkeys[hotkey_id]
+            config, _ = self._hotkeys.pop(hotkey_id)
+            pynput_key = config.to_pynput_key()
+            entries = self._by_key.get(pynput_key)
+            if entries is not None:
+                entries.pop(hotkey_id, None)
+                if not entries:
+                    del self._by_key[pynput_key]
             return True
         return False
         
     def _on_press(self, key) -> None:
         """キー押下時のコールバック"""
         # モディファイアキーを追跡
-        if key in (keyboard.Key.ctrl_l, keyboard.Key.ctrl_r):
-            self._pressed_modifiers.add(keyboard.Key.ctrl_l)
-        elif key in (keyboard.Key.alt_l, keyboard.Key.alt_r):
-            self._pressed_modifiers.add(keyboard.Key.alt_l)
-        elif key in (keyboard.Key.shift_l, keyboard.Key.shift_r):
-            self._pressed_modifiers.add(keyboard.Key.shift_l)
-        elif key in (keyboard.Key.cmd_l, keyboard.Key.cmd_r):
-            self._pressed_modifiers.add(keyboard.Key.cmd_l)
+        bit = _MODIFIER_BITS.get(key)
+        if bit is not None:
+            self._mod_mask |= bit
             
-        # 登録されたホットキーをチェック
-        for hotkey_id, (config, callback) in self._hotkeys.items():
-            target_key = config.to_pynput_key()
+        # 押されたキーに登録されたホットキーだけを取り出す
+        entries = self._by_key.get(key)
+        if entries is None:
+            return
             
-            # キーが一致するかチェック
-            if key == target_key:
-                # モディファイアをチェック
-                ctrl_required = config.modifiers & MOD.CONTROL
-                alt_required = config.modifiers & MOD.ALT
-                shift_required = config.modifiers & MOD.SHIFT
-                win_required = config.modifiers & MOD.WIN
-                
-                ctrl_pressed = keyboard.Key.ctrl_l in self._pressed_modifiers
-                alt_pressed = keyboard.Key.alt_l in self._pressed_modifiers
-                shift_pressed = keyboard.Key.shift_l in self._pressed_modifiers
-                win_pressed = keyboard.Key.cmd_l in self._pressed_modifiers
-                
-                # モディファイアが0の場合は単独キー
-                if config.modifiers == 0:
-                    # モディファイアなしの場合
-                    logger.info(f"ホットキー検出: {config}")
-                    try:
-                        callback()
-                    except Exception as e:
-                        logger.error(f"ホットキーコールバックエラー: {e}")
-                elif (bool(ctrl_required) == ctrl_pressed and
-                      bool(alt_required) == alt_pressed and
-                      bool(shift_required) == shift_pressed and
-                      bool(win_required) == win_pressed):
-                    logger.info(f"ホットキー検出: {config}")
-                    try:
-                        callback()
-                    except Exception as e:
-                        logger.error(f"ホットキーコールバックエラー: {e}")
-                        
+        mod_mask = self._mod_mask
+        for config, callback, mask in tuple(entries.values()):
+            # モディファイアが0の場合は単独キー、それ以外は押下中のモディファイアと完全一致
+            if mask == 0 or mask == mod_mask:
+                # 押下ごとの経路なので、DEBUG 無効時は文字列化自体を行わない
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("ホットキー検出: %s", config)
+                try:
+                    callback()
+                except Exception as e:
+                    logger.error(f"ホットキーコールバックエラー: {e}")
+                    
     def _on_release(self, key) -> None:
         """キー解放時のコールバック"""
         # モディファイアキーを追跡から削除
-        if key in (keyboard.Key.ctrl_l, keyboard.Key.ctrl_r):
-            self._pressed_modifiers.discard(keyboard.Key.ctrl_l)
-        elif key in (keyboard.Key.alt_l, keyboard.Key.alt_r):
-            self._pressed_modifiers.discard(keyboard.Key.alt_l)
-        elif key in (keyboard.Key.shift_l, keyboard.Key.shift_r):
-            self._pressed_modifiers.discard(keyboard.Key.shift_l)
-        elif key in (keyboard.Key.cmd_l, keyboard.Key.cmd_r):
-            self._pressed_modifiers.discard(keyboard.Key.cmd_l)
+        bit = _MODIFIER_BITS.get(key)
+        if bit is not None:
+            self._mod_mask &= ~bit
         
     def start(self) -> None:
         """ホットキーリスナーを開始"""
@@ -208,6 +411,7 @@ class GlobalHotkeyManager:
             return
             
         self._running = True
+        self._mod_mask = 0
         self._listener = keyboard.Listener(
             on_press=self._on_press,
             on_release=self._on_release
@@ -246,15 +450,16 @@ class RecordingToggle:
         self.on_start = on_start
         self.on_stop = on_stop
         self._is_recording = False
-        self._last_toggle_time = 0.0
-        self._debounce_ms = debounce_ms
+        self._last_toggle_time = 0  # time.monotonic_ns() の値
+        self._debounce_ns = debounce_ms * 1_000_000
         
     def _check_debounce(self) -> bool:
         """デバウンスチェック"""
-        current_time = time.time() * 1000
-        if current_time - self._last_toggle_time < self._debounce_ms:
+        # 単調増加の整数ナノ秒で比較する（壁時計の変更に影響されない）
+        now = time.monotonic_ns()
+        if now - self._last_toggle_time < self._debounce_ns:
             return False
-        self._last_toggle_time = current_time
+        self._last_toggle_time = now
         return True
         
     def toggle(self) -> bool:
@@ -1,5 +1,5 @@
 """テキスト注入モジュール"""
 
-from .send_input import TextInjector, InjectionResult, UIPIChecker, inject_text
+from .send_input import TextInjector, InjectionMode, InjectionResult, UIPIChecker, inject_text
 
-__all__ = ["TextInjector", "InjectionResult", "UIPIChecker", "inject_text"]
+__all__ = ["TextInjector", "InjectionMode", "InjectionResult", "UIPIChecker", "inject_text"]
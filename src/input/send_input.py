@@ -7,10 +7,13 @@ Win32 SendInput API を使用して Unicode テキストをアクティブウィ
 
 import ctypes
 from ctypes import wintypes
-from typing import Optional, List
+from typing import Optional, List, Sequence, Tuple
 from dataclasses import dataclass
+from enum import Enum
 import time
 
+import numpy as np
+
 
 # Windows 構造体定義
 class KEYBDINPUT(ctypes.Structure):
@@ -57,10 +60,43 @@ class INPUT(ctypes.Structure):
     ]
 
 
+class GUITHREADINFO(ctypes.Structure):
+    _fields_ = [
+        ("cbSize", wintypes.DWORD),
+        ("flags", wintypes.DWORD),
+        ("hwndActive", wintypes.HWND),
+        ("hwndFocus", wintypes.HWND),
+        ("hwndCapture", wintypes.HWND),
+        ("hwndMenuOwner", wintypes.HWND),
+        ("hwndMoveSize", wintypes.HWND),
+        ("hwndCaret", wintypes.HWND),
+        ("rcCaret", wintypes.RECT),
+    ]
+
+
 # 定数
 INPUT_KEYBOARD = 1
 KEYEVENTF_UNICODE = 0x0004
 KEYEVENTF_KEYUP = 0x0002
+WM_CHAR = 0x0102
+GUI_INMOVESIZE = 0x0002
+GUI_INMENUMODE = 0x0004
+GCS_COMPSTR = 0x0008
+
+# WM_CHAR を直接受け付ける標準コントロールのクラス名（小文字で比較）
+WM_CHAR_WINDOW_CLASSES = frozenset({"edit", "richedit20w", "richedit50w", "scintilla"})
+
+# INPUT 構造体内の wScan のバイトオフセット（numpy ビューで一括書き込みするため）
+_WSCAN_OFFSET = INPUT.union.offset + KEYBDINPUT.wScan.offset
+
+# INPUT 構造体のバイトサイズ（SendInput の cbSize やバッファ計算で毎回使う）
+_INPUT_SIZE = ctypes.sizeof(INPUT)
+
+
+class InjectionMode(Enum):
+    """テキスト注入方式"""
+    SEND_INPUT = "send_input"  # 常に SendInput で注入
+    WM_CHAR = "wm_char"        # 対応コントロールには WM_CHAR を直接送り、それ以外は SendInput
 
 
 @dataclass
@@ -68,10 +104,14 @@ class InjectionResult:
     """注入結果"""
     success: bool
     characters_sent: int
-    failed_characters: List[str]
+    failed_characters: Sequence[str]  # 失敗なしの場合は共有の空タプル
     elapsed_ms: float
 
 
+# 成功時に共有する空の失敗文字列（成功パスで空リストを確保しない）
+_NO_FAILURES: Tuple[str, ...] = ()
+
+
 class TextInjector:
     """
     テキスト注入モジュール
@@ -87,15 +127,21 @@ class TextInjector:
     def __init__(
         self,
         delay_between_chars_ms: float = 0.0,
-        batch_size: int = 50
+        batch_size: int = 50,
+        batch_chars: int = 8,
+        mode: InjectionMode = InjectionMode.SEND_INPUT
     ):
         """
         Args:
-            delay_between_chars_ms: 文字間の遅延時間（ミリ秒）
-            batch_size: 一度に送信する最大文字数
+            delay_between_chars_ms: 文字グループ間の遅延時間（ミリ秒）。0 の場合は待機しない。
+            batch_size: SendInput の送信数が不足した場合に再送する1回あたりの文字数
+            batch_chars: 遅延ありの場合に1回の SendInput でまとめて送る文字数
+            mode: 注入方式
         """
         self.delay_between_chars_ms = delay_between_chars_ms
         self.batch_size = batch_size
+        self.batch_chars = max(1, batch_chars)
+        self.mode = mode
         
         # Windows API
         self._user32 = ctypes.windll.user32
@@ -106,6 +152,23 @@ class TextInjector:
             ctypes.c_int
         ]
         self._send_input.restype = wintypes.UINT
+        self._post_message = self._user32.PostMessageW
+        self._post_message.argtypes = [
+            wintypes.HWND,
+            wintypes.UINT,
+            wintypes.WPARAM,
+            wintypes.LPARAM
+        ]
+        self._post_message.restype = wintypes.BOOL
+        
+        # キーダウン/キーアップの INPUT テンプレート（文字ごとに変わるのは wScan のみ）
+        self._template = (INPUT * 2)()
+        self._template[0] = self._create_unicode_input("\0", key_up=False)
+        self._template[1] = self._create_unicode_input("\0", key_up=True)
+        
+        # テンプレートで埋めた INPUT 配列を使い回す（不足したときだけ拡張する）
+        self._inputs = (INPUT * 0)()
+        self._inputs_capacity = 0
         
     def _create_unicode_input(self, char: str, key_up: bool = False) -> INPUT:
         """
@@ -143,13 +206,8 @@ class TextInjector:
         Returns:
             成功したかどうか
         """
-        # キーダウンとキーアップの2つのイベントを送信
-        inputs = (INPUT * 2)()
-        inputs[0] = self._create_unicode_input(char, key_up=False)
-        inputs[1] = self._create_unicode_input(char, key_up=True)
-        
-        result = self._send_input(2, inputs, ctypes.sizeof(INPUT))
-        return result == 2
+        # キーダウンとキーアップのイベントを送信（BMP 外の文字はサロゲートペアで4イベント）
+        return not self._inject_batched(char)
         
     def inject(self, text: str) -> InjectionResult:
         """
@@ -165,40 +223,319 @@ class TextInjector:
             return InjectionResult(
                 success=True,
                 characters_sent=0,
-                failed_characters=[],
+                failed_characters=_NO_FAILURES,
                 elapsed_ms=0.0
             )
             
         start_time = time.perf_counter()
         
-        characters_sent = 0
+        hwnd = None
+        if self.mode is InjectionMode.WM_CHAR:
+            hwnd = self._find_focus_window()
+            if hwnd is not None and self._window_class(hwnd).lower() not in WM_CHAR_WINDOW_CLASSES:
+                hwnd = None
+                
+        if hwnd is not None:
+            # メッセージキューへ直接送るので IME 対策の遅延も不要
+            failed_characters = self._post_chars(hwnd, text)
+        elif self.delay_between_chars_ms > 0:
+            failed_characters = self._inject_grouped(text)
+        else:
+            failed_characters = self._inject_batched(text)
+            
+        return self._make_result(text, failed_characters, start_time)
+        
+    def inject_wm_char(self, text: str) -> InjectionResult:
+        """
+        フォーカス中のコントロールへ WM_CHAR を直接送ってテキストを注入
+        
+        raw input キューを経由しないため、SendInput より速く IME の影響も受けない。
+        ウィンドウクラスは確認しないので、WM_CHAR を処理できる相手にだけ使うこと。
+        
+        Args:
+            text: 送信するテキスト
+            
+        Returns:
+            注入結果。フォーカスウィンドウが見つからない場合は全文字が失敗扱い。
+        """
+        start_time = time.perf_counter()
+        
+        hwnd = self._find_focus_window()
+        if hwnd is None:
+            failed_characters = list(text)
+        else:
+            failed_characters = self._post_chars(hwnd, text)
+            
+        return self._make_result(text, failed_characters, start_time)
+        
+    @staticmethod
+    def _make_result(text: str, failed_characters: List[str], start_time: float) -> InjectionResult:
+        """
+        注入結果を作成
+        
+        Args:
+            text: 送信したテキスト
+            failed_characters: 送信に失敗した文字のリスト
+            start_time: 注入開始時刻（perf_counter）
+            
+        Returns:
+            注入結果
+        """
+        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        if not failed_characters:
+            return InjectionResult(True, len(text), _NO_FAILURES, elapsed_ms)
+        return InjectionResult(False, len(text) - len(failed_characters), failed_characters, elapsed_ms)
+        
+    def wait_for_ime_ready(self, timeout_ms: float = 50.0, poll_interval_ms: float = 2.0) -> bool:
+        """
+        フォアグラウンドウィンドウが入力を受け付けられる状態になるまで待つ
+        
+        固定時間の sleep の代わりに、準備ができていれば即座に戻る。
+        
+        Args:
+            timeout_ms: 最大待機時間（ミリ秒）
+            poll_interval_ms: 状態を確認する間隔（ミリ秒）
+            
+        Returns:
+            True if タイムアウト前に準備完了
+        """
+        deadline = time.perf_counter() + timeout_ms / 1000
+        interval = poll_interval_ms / 1000
+        while not self._is_ime_ready():
+            if time.perf_counter() >= deadline:
+                return False
+            time.sleep(interval)
+        return True
+        
+    def _is_ime_ready(self) -> bool:
+        """
+        入力を受け付けられる状態かどうか
+        
+        ウィンドウの移動/リサイズ中・メニュー操作中、または IME の未確定文字列がある間は False。
+        別プロセスの入力コンテキストは取得できないことがあり、その場合は IME の判定を省く。
+        
+        Returns:
+            True if 準備完了
+        """
+        user32 = self._user32
+        hwnd = user32.GetForegroundWindow()
+        if not hwnd:
+            return True
+            
+        thread_id = user32.GetWindowThreadProcessId(hwnd, None)
+        info = GUITHREADINFO(cbSize=ctypes.sizeof(GUITHREADINFO))
+        if user32.GetGUIThreadInfo(thread_id, ctypes.byref(info)):
+            if info.flags & (GUI_INMOVESIZE | GUI_INMENUMODE):
+                return False
+            hwnd = info.hwndFocus or hwnd
+            
+        imm32 = ctypes.windll.imm32
+        himc = imm32.ImmGetContext(hwnd)
+        if not himc:
+            return True
+        try:
+            # 未確定文字列のバイト数（0 なら変換中ではない）
+            return imm32.ImmGetCompositionStringW(himc, GCS_COMPSTR, None, 0) <= 0
+        finally:
+            imm32.ImmReleaseContext(hwnd, himc)
+            
+    def _find_focus_window(self) -> Optional[int]:
+        """
+        フォアグラウンドウィンドウのスレッドでキーボードフォーカスを持つウィンドウを取得
+        
+        Returns:
+            ウィンドウハンドル、または取得失敗時は None
+        """
+        user32 = self._user32
+        hwnd = user32.GetForegroundWindow()
+        if not hwnd:
+            return None
+            
+        thread_id = user32.GetWindowThreadProcessId(hwnd, None)
+        info = GUITHREADINFO(cbSize=ctypes.sizeof(GUITHREADINFO))
+        if not user32.GetGUIThreadInfo(thread_id, ctypes.byref(info)):
+            return None
+        return info.hwndFocus or None
+        
+    def _window_class(self, hwnd: int) -> str:
+        """
+        ウィンドウクラス名を取得
+        
+        Args:
+            hwnd: ウィンドウハンドル
+            
+        Returns:
+            クラス名（取得失敗時は空文字列）
+        """
+        buffer = ctypes.create_unicode_buffer(256)
+        if not self._user32.GetClassNameW(hwnd, buffer, len(buffer)):
+            return ""
+        return buffer.value
+        
+    def _post_chars(self, hwnd: int, text: str) -> List[str]:
+        """
+        文字ごとに WM_CHAR を PostMessage する（BMP 外の文字は上位→下位サロゲートの順）
+        
+        Args:
+            hwnd: 送信先ウィンドウ
+            text: 送信するテキスト
+            
+        Returns:
+            送信に失敗した文字のリスト
+        """
+        post_message = self._post_message
         failed_characters = []
+        for char in text:
+            code = ord(char)
+            if code > 0xFFFF:
+                code -= 0x10000
+                units = (0xD800 | (code >> 10), 0xDC00 | (code & 0x3FF))
+            else:
+                units = (code,)
+            for unit in units:
+                if not post_message(hwnd, WM_CHAR, unit, 0):
+                    failed_characters.append(char)
+                    break
+        return failed_characters
         
-        for i, char in enumerate(text):
-            # バッチサイズごとに少し待機
-            if i > 0 and i % self.batch_size == 0:
-                time.sleep(0.01)  # 10ms
-                
-            success = self.inject_char(char)
+    def _inject_batched(self, text: str) -> List[str]:
+        """
+        全文字のキーダウン/キーアップを1つの INPUT 配列にまとめて SendInput で送信
+        
+        通常は SendInput 1回で完了する。送信数が不足した場合のみ、
+        残りを batch_size 文字単位に分けて再送する。
+        
+        Args:
+            text: 送信するテキスト
             
-            if success:
-                characters_sent += 1
+        Returns:
+            送信に失敗した文字のリスト
+        """
+        # UTF-16 コード単位ごとに down/up を送る（BMP 外の文字はサロゲートペアの2単位になる）
+        units = np.frombuffer(text.encode("utf-16-le", "surrogatepass"), dtype=np.uint16)
+        total = len(units) * 2
+        input_size = _INPUT_SIZE
+        inputs = self._reserve_inputs(total)
+        
+        # 単位ごとに変わる wScan だけを、INPUT 配列上の numpy ビューへ一括で書き込む
+        wscan = np.ndarray(
+            shape=(len(units), 2),
+            dtype=np.uint16,
+            buffer=inputs,
+            offset=_WSCAN_OFFSET,
+            strides=(2 * input_size, input_size)
+        )
+        wscan[:] = units[:, None]
+        
+        send_input = self._send_input
+        base = ctypes.addressof(inputs)
+        pointer_type = ctypes.POINTER(INPUT)
+        failed_characters = []
+        char_starts = None
+        max_events = total
+        event = 0
+        while event < total:
+            count = min(total - event, max_events)
+            sent = send_input(count, ctypes.cast(base + event * input_size, pointer_type), input_size)
+            if sent == 0 and event % 2:
+                # キーダウンは送信済みで文字は入力されている。キーが押されたままにならないよう
+                # 保留中のキーアップだけを送り直し、失敗扱いにはしない
+                send_input(1, ctypes.cast(base + event * input_size, pointer_type), input_size)
+                event += 1
+            elif sent == 0:
+                # キーダウンを送信できなかった文字を記録して次の文字から再開
+                if char_starts is None:
+                    char_starts = self._char_unit_starts(text, len(units))
+                char_index = int(np.searchsorted(char_starts, event // 2, side="right")) - 1
+                failed_characters.append(text[char_index])
+                next_unit = char_starts[char_index + 1] if char_index + 1 < len(text) else len(units)
+                event = int(next_unit) * 2
             else:
-                failed_characters.append(char)
+                event += sent
+            if sent < count:
+                # 入力キューが詰まっている場合は小分けにして再送する
+                max_events = self.batch_size * 2
                 
-            # 文字間遅延
-            if self.delay_between_chars_ms > 0:
-                time.sleep(self.delay_between_chars_ms / 1000)
-                
-        elapsed_ms = (time.perf_counter() - start_time) * 1000
+        return failed_characters
         
-        return InjectionResult(
-            success=len(failed_characters) == 0,
-            characters_sent=characters_sent,
-            failed_characters=failed_characters,
-            elapsed_ms=elapsed_ms
-        )
+    def _reserve_inputs(self, total: int) -> ctypes.Array:
+        """
+        テンプレートで埋めた INPUT 配列を返す
+        
+        type/dwFlags などは全イベント共通なので、配列を確保したときに一度だけ
+        テンプレートを複製しておけば、以降の送信では wScan を書き換えるだけでよい。
+        
+        Args:
+            total: 必要なイベント数
+            
+        Returns:
+            total 以上の要素を持つ INPUT 配列
+        """
+        if total <= self._inputs_capacity:
+            return self._inputs
+            
+        capacity = max(total, self._inputs_capacity * 2)
+        input_size = _INPUT_SIZE
+        inputs = (INPUT * capacity)()
+        
+        # テンプレートを配列全体に複製する（コピー済み領域を倍々に memmove）
+        base = ctypes.addressof(inputs)
+        ctypes.memmove(base, self._template, 2 * input_size)
+        filled = 2
+        while filled < capacity:
+            count = min(filled, capacity - filled)
+            ctypes.memmove(base + filled * input_size, base, count * input_size)
+            filled += count
+            
+        self._inputs = inputs
+        self._inputs_capacity = capacity
+        return inputs
+        
+    @staticmethod
+    def _char_unit_starts(text: str, unit_count: int) -> np.ndarray:
+        """
+        各文字の先頭 UTF-16 コード単位のインデックスを求める
         
+        Args:
+            text: テキスト
+            unit_count: UTF-16 コード単位数
+            
+        Returns:
+            文字ごとの先頭コード単位インデックス
+        """
+        if unit_count == len(text):
+            return np.arange(len(text))
+        codes = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+        widths = 1 + (codes > 0xFFFF)
+        return np.concatenate(([0], np.cumsum(widths[:-1])))
+        
+    def _inject_grouped(self, text: str) -> List[str]:
+        """
+        batch_chars 文字ずつ送信し、グループ間にだけ遅延を入れる（IME 対策などの低速パス）
+        
+        Windows の既定タイマー分解能（約 15.6ms）では短い sleep が大きく延びるため、
+        送信中だけ timeBeginPeriod(1) で 1ms 分解能にする。
+        
+        Args:
+            text: 送信するテキスト
+            
+        Returns:
+            送信に失敗した文字のリスト
+        """
+        winmm = ctypes.windll.winmm
+        winmm.timeBeginPeriod(1)
+        try:
+            failed_characters = []
+            delay = self.delay_between_chars_ms / 1000
+            step = self.batch_chars
+            for start in range(0, len(text), step):
+                if start > 0:
+                    time.sleep(delay)
+                failed_characters.extend(self._inject_batched(text[start:start + step]))
+            return failed_characters
+        finally:
+            winmm.timeEndPeriod(1)
+            
     def inject_with_ime_workaround(self, text: str) -> InjectionResult:
         """
         IME 対応のテキスト注入
@@ -4,20 +4,28 @@
 F8 キーで録音を開始/停止し、音声認識結果をアクティブウィンドウに入力する。
 """
 
+import os
+import re
 import sys
+import ctypes
 import logging
-import time
 import threading
+import queue
 import atexit
-from typing import Optional
+from ctypes import wintypes
+from typing import Optional, TYPE_CHECKING
+
+import numpy as np
 
 from src.audio import WasapiCapture
-from src.vad import SileroVAD, SimpleEnergyVAD
-from src.stt import WhisperStreamProcessor, AudioAccumulator
-from src.input import TextInjector
-from src.hotkey import GlobalHotkeyManager, RecordingToggle, HotkeyConfig, VK, DEFAULT_HOTKEY
+from src.input import TextInjector, InjectionMode
+from src.hotkey import GlobalHotkeyManager, PynputHotkeyManager, RecordingToggle, HotkeyConfig, VK, DEFAULT_HOTKEY
 from src.metrics import LatencyTimer, LatencyLogger, MeasurementPoint, get_latency_logger
 
+if TYPE_CHECKING:
+    # torch / faster-whisper を読み込むため、実行時は _init_components で遅延インポートする
+    from src.stt import WhisperStreamProcessor, AudioAccumulator
+
 
 # ロギング設定
 logging.basicConfig(
@@ -26,6 +34,64 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# STT ディスパッチスレッドの固定先コア数と優先度（CTranslate2 の推論スレッドには適用されない）
+STT_THREAD_CORES = 4
+THREAD_PRIORITY_ABOVE_NORMAL = 1
+
+# Whisper が無音・雑音から生成しやすい定型文（幻覚）
+HALLUCINATION_PATTERNS = (
+    "ご視聴ありがとう", "チャンネル登録", "お願いします",
+    "ご静聴", "♪", "..."
+)
+# 全パターンを1回の走査で判定できるよう1つの正規表現にまとめる
+_HALLUCINATION_RE = re.compile("|".join(map(re.escape, HALLUCINATION_PATTERNS)))
+
+# Win32 定数
+INFINITE = 0xFFFFFFFF
+WAIT_OBJECT_0 = 0x00000000
+QS_ALLINPUT = 0x04FF
+PM_REMOVE = 0x0001
+PROCESS_PER_MONITOR_DPI_AWARE = 2
+CTRL_C_EVENT = 0
+CTRL_BREAK_EVENT = 1
+CTRL_CLOSE_EVENT = 2
+
+
+def _pin_current_thread(cores: int = STT_THREAD_CORES) -> None:
+    """
+    現在のスレッドを固定のコアに割り当て、優先度を上げる（Windows のみ）
+    
+    コア 0 は割り込みや他プロセスと競合しやすいため、可能ならコア 1 から割り当てる。
+    
+    固定されるのは呼び出したスレッド（STT の発話を順に処理するディスパッチスレッド）だけで、
+    CTranslate2 の推論スレッドは対象外。Windows では新しいスレッドは作成元スレッドではなく
+    プロセスのアフィニティを引き継ぐため、モデルをどのスレッドで構築しても推論スレッドは全コアで動く
+    （スレッド数は WhisperStreamProcessor の cpu_threads で制御する）。
+    ディスパッチスレッドは推論中は GIL を離して待機しているため、推論スレッドとの競合は
+    前処理・後処理とテキスト注入の間に限られる。
+    
+    Args:
+        cores: 割り当てるコア数
+    """
+    if not hasattr(ctypes, "windll"):
+        return
+        
+    cpu_count = os.cpu_count() or 1
+    first = 1 if cpu_count > cores else 0
+    count = min(cores, cpu_count - first)
+    mask = ((1 << count) - 1) << first
+    
+    try:
+        kernel32 = ctypes.windll.kernel32
+        kernel32.GetCurrentThread.restype = ctypes.c_void_p
+        handle = kernel32.GetCurrentThread()
+        if not kernel32.SetThreadAffinityMask(ctypes.c_void_p(handle), ctypes.c_size_t(mask)):
+            logger.warning("STT スレッドのアフィニティ設定に失敗")
+        if not kernel32.SetThreadPriority(ctypes.c_void_p(handle), THREAD_PRIORITY_ABOVE_NORMAL):
+            logger.warning("STT スレッドの優先度設定に失敗")
+    except Exception as e:
+        logger.warning("STT スレッドの固定に失敗: %s", e)
+
 
 class VoiceInputAgent:
     """音声入力エージェント"""
@@ -34,28 +100,45 @@ class VoiceInputAgent:
         self,
         hotkey_config: Optional[HotkeyConfig] = None,
         use_silero_vad: bool = True,
-        whisper_model_size: str = "base"
+        whisper_model_size: str = "base",
+        vad_model_path: Optional[str] = None,
+        injection_mode: InjectionMode = InjectionMode.SEND_INPUT
     ):
         self.hotkey_config = hotkey_config or DEFAULT_HOTKEY
         self.use_silero_vad = use_silero_vad
+        self.vad_model_path = vad_model_path
+        self.injection_mode = injection_mode
         self.whisper_model_size = whisper_model_size
         
         # コンポーネント
         self._capture: Optional[WasapiCapture] = None
         self._vad = None
-        self._stt: Optional[WhisperStreamProcessor] = None
+        self._stt: Optional["WhisperStreamProcessor"] = None
         self._injector: Optional[TextInjector] = None
-        self._accumulator: Optional[AudioAccumulator] = None
-        self._hotkey_manager: Optional[GlobalHotkeyManager] = None
+        self._accumulator: Optional["AudioAccumulator"] = None
+        self._hotkey_manager: Optional[GlobalHotkeyManager | PynputHotkeyManager] = None
         self._recording_toggle: Optional[RecordingToggle] = None
         self._latency_logger: Optional[LatencyLogger] = None
         
+        # 発話単位の音声をキャプチャ側から STT ワーカーへ受け渡すキュー（None で終了）
+        self._utterance_queue: "queue.SimpleQueue[Optional[np.ndarray]]" = queue.SimpleQueue()
+        self._stt_worker: Optional[threading.Thread] = None
+        
+        # 終了待ち（Windows ではイベントオブジェクトでメインスレッドをカーネル待機させる）
+        self._stop_handle = None
+        self._console_handler = None
+        self._stop_event = threading.Event()
+        
         self._running = False
         
     def _init_components(self) -> None:
         """コンポーネントを初期化"""
         logger.info("コンポーネントを初期化中...")
         
+        # 重い依存（torch / faster-whisper）は --list-devices などで読み込まないよう、ここでインポートする
+        from src.vad import SileroVAD, SimpleEnergyVAD
+        from src.stt import WhisperStreamProcessor, AudioAccumulator
+        
         # 音声キャプチャ
         self._capture = WasapiCapture()
         
@@ -64,11 +147,12 @@ class VoiceInputAgent:
             try:
                 self._vad = SileroVAD(
                     min_speech_duration_ms=150,
-                    min_silence_duration_ms=50
+                    min_silence_duration_ms=50,
+                    model_path=self.vad_model_path
                 )
                 logger.info("Silero VAD を使用")
             except Exception as e:
-                logger.warning(f"Silero VAD の初期化に失敗: {e}")
+                logger.warning("Silero VAD の初期化に失敗: %s", e)
                 self._vad = SimpleEnergyVAD(
                     min_speech_duration_ms=150,
                     min_silence_duration_ms=50
@@ -81,7 +165,7 @@ class VoiceInputAgent:
         self._stt = WhisperStreamProcessor(
             model_size=self.whisper_model_size,
             device="cpu",
-            compute_type="int8",
+            compute_type="auto",
             language="ja",
             beam_size=3
         )
@@ -91,7 +175,7 @@ class VoiceInputAgent:
         self._stt.preload()
         
         # テキスト注入
-        self._injector = TextInjector(delay_between_chars_ms=5.0)
+        self._injector = TextInjector(delay_between_chars_ms=5.0, mode=self.injection_mode)
         
         # 音声アキュムレータ
         self._accumulator = AudioAccumulator()
@@ -106,15 +190,53 @@ class VoiceInputAgent:
         )
         
         # ホットキーマネージャー
-        self._hotkey_manager = GlobalHotkeyManager()
-        self._hotkey_manager.register(
+        self._hotkey_manager = self._create_hotkey_manager(GlobalHotkeyManager)
+        
+        # 初回推論のコストを起動時に済ませる
+        self._warmup()
+        
+        logger.info("初期化完了")
+        
+    def _create_hotkey_manager(self, manager_cls):
+        """ホットキーマネージャーを作成し、録音トグルのホットキーを登録する"""
+        manager = manager_cls()
+        manager.register(
             hotkey_id=1,
             config=self.hotkey_config,
             callback=self._recording_toggle.toggle
         )
+        return manager
         
-        logger.info("初期化完了")
+    def _start_hotkey_manager(self) -> None:
+        """
+        ホットキーの受付を開始する
         
+        RegisterHotKey による登録に失敗した場合（他のアプリが同じキーを使用中など）は
+        pynput のキーボードフックに切り替える。
+        """
+        if self._hotkey_manager.start():
+            return
+        logger.warning("RegisterHotKey が使えないため pynput のホットキーに切り替えます")
+        self._hotkey_manager = self._create_hotkey_manager(PynputHotkeyManager)
+        self._hotkey_manager.start()
+        
+    def _warmup(self) -> None:
+        """微小な音声データで VAD と STT を1回ずつ実行し、初回推論の遅延を起動時に吸収する"""
+        logger.info("音声認識をウォームアップ中...")
+        # 100ms 分の 16kHz/16bit 音声。VAD は完全な無音だと推論を省くため、下限を超える微小な矩形波（±64）にする
+        faint = b"\x40\x00\xc0\xff" * 800
+        
+        try:
+            self._vad.is_speech(faint)
+            self._vad.reset()
+        except Exception as e:
+            logger.warning("VAD のウォームアップに失敗: %s", e)
+            
+        try:
+            self._stt.warmup()
+        except Exception as e:
+            logger.warning("音声認識のウォームアップに失敗: %s", e)
+            
     def _on_recording_start(self) -> None:
         """録音開始"""
         logger.info("🎤 録音開始")
@@ -129,18 +251,34 @@ class VoiceInputAgent:
         
         # 残りのバッファを処理
         audio_data = self._accumulator.flush()
-        if audio_data:
-            self._process_audio(audio_data)
+        if audio_data is not None:
+            self._utterance_queue.put_nowait(audio_data)
+            
+    def _on_audio_chunk(self, audio_data: np.ndarray) -> None:
+        """
+        音声チャンク受信（キャプチャのワーカースレッド）
+        
+        VAD と蓄積だけを行い、発話がそろったら STT ワーカーへ渡す。
+        認識処理でチャンクの受信が止まらないよう、ここでは待機しない。
+        """
+        complete_audio = self._accumulator.feed_with_vad(audio_data, self._vad)
+        
+        if complete_audio is not None:
+            self._utterance_queue.put_nowait(complete_audio)
             
-    def _on_audio_chunk(self, audio_data: bytes) -> None:
-        """音声チャンク受信"""
-        is_speech = self._vad.is_speech(audio_data)
-        complete_audio = self._accumulator.add(audio_data, is_speech)
+    def _stt_loop(self) -> None:
+        """STT ワーカースレッド: 発話を順に認識・注入する"""
+        # このディスパッチスレッドだけをセッション中は同じコア群で動かし、キャッシュの局所性を保つ
+        # （CTranslate2 の推論スレッドは固定されない。_pin_current_thread を参照）
+        _pin_current_thread()
         
-        if complete_audio:
-            self._process_audio(complete_audio)
+        while True:
+            audio_data = self._utterance_queue.get()
+            if audio_data is None:
+                break
+            self._process_audio(audio_data)
             
-    def _process_audio(self, audio_data: bytes) -> None:
+    def _process_audio(self, audio_data: np.ndarray) -> None:
         """音声処理"""
         timer = LatencyTimer()
         timer.mark(MeasurementPoint.SPEECH_END)
@@ -154,40 +292,39 @@ class VoiceInputAgent:
                 clean_text = result.text.strip()
                 
                 if self._is_valid_text(clean_text):
-                    logger.info(f"認識結果: {clean_text}")
+                    logger.info("認識結果: %s", clean_text)
                     
-                    time.sleep(0.05)
+                    # 対象ウィンドウが入力を受け付けられるまで待つ（準備済みなら待たない）
+                    self._injector.wait_for_ime_ready()
                     
                     timer.mark(MeasurementPoint.INJECTION_START)
                     injection_result = self._injector.inject_with_ime_workaround(clean_text)
                     timer.mark(MeasurementPoint.INJECTION_END)
                     
                     if injection_result.success:
-                        logger.info(f"✓ 注入完了 ({len(clean_text)} 文字)")
+                        logger.info("✓ 注入完了 (%d 文字)", len(clean_text))
                     
                     measurement = timer.get_measurement(text_length=len(clean_text))
                     self._latency_logger.log(measurement)
                     
                     if not self._latency_logger.check_target(500.0):
-                        logger.warning(f"⚠ レイテンシ超過: {measurement.total_latency_ms:.0f}ms")
+                        logger.warning("⚠ レイテンシ超過: %.0fms", measurement.total_latency_ms)
                         
         except Exception as e:
-            logger.error(f"音声処理エラー: {e}")
+            logger.error("音声処理エラー: %s", e)
             
     def _is_valid_text(self, text: str) -> bool:
         """有効なテキストか判定"""
         if not text or len(text) < 1:
             return False
             
-        hallucination_patterns = [
-            "ご視聴ありがとう", "チャンネル登録", "お願いします",
-            "ご静聴", "♪", "..."
-        ]
-        
-        for pattern in hallucination_patterns:
-            if pattern in text:
-                return False
-        return True
+        match = _HALLUCINATION_RE.search(text)
+        if match is None:
+            return True
+            
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("ハルシネーションとして破棄: %r (パターン: %r)", text, match.group())
+        return False
             
     def run(self) -> None:
         """エージェント実行"""
@@ -196,24 +333,90 @@ class VoiceInputAgent:
         print()
         print("=" * 50)
         print(f"  ホットキー: {self.hotkey_config}")
-        print(f"  終了: Ctrl+C を 2回 押す")
+        print(f"  終了: Ctrl+C")
         print("=" * 50)
         print()
         
         self._running = True
-        self._hotkey_manager.start()
+        self._stt_worker = threading.Thread(target=self._stt_loop, daemon=True)
+        self._stt_worker.start()
+        self._start_hotkey_manager()
         
         # 終了時のクリーンアップを登録
         atexit.register(self._cleanup)
         
         try:
-            while self._running:
-                time.sleep(0.5)
+            self._wait_for_stop()
         except KeyboardInterrupt:
             print("\n終了中...")
         finally:
             self.stop()
             
+    def _wait_for_stop(self) -> None:
+        """
+        停止要求までメインスレッドを待機させる（ポーリングなし）
+        
+        Windows では WaitForSingleObject 中に Python のシグナルハンドラが動かないため、
+        Ctrl+C はコンソール制御ハンドラ（別スレッドで呼ばれる）で停止イベントに変換する。
+        """
+        if not hasattr(ctypes, "windll"):
+            self._stop_event.wait()
+            return
+            
+        kernel32 = ctypes.windll.kernel32
+        kernel32.CreateEventW.restype = ctypes.c_void_p
+        self._stop_handle = kernel32.CreateEventW(None, True, False, None)
+        
+        handler_type = ctypes.WINFUNCTYPE(ctypes.c_int, ctypes.c_uint)
+        self._console_handler = handler_type(self._on_console_ctrl)
+        kernel32.SetConsoleCtrlHandler(self._console_handler, True)
+        try:
+            if self._running:
+                self._wait_with_message_pump(self._stop_handle)
+        finally:
+            kernel32.SetConsoleCtrlHandler(self._console_handler, False)
+            kernel32.CloseHandle(ctypes.c_void_p(self._stop_handle))
+            self._stop_handle = None
+            
+    def _wait_with_message_pump(self, handle) -> None:
+        """
+        停止イベントがシグナルされるまでカーネル内で待機する
+        
+        メインスレッド宛てのウィンドウメッセージ（COM など）が届いた場合だけ起床して処理する。
+        
+        Args:
+            handle: 停止イベントのハンドル
+        """
+        user32 = ctypes.windll.user32
+        user32.MsgWaitForMultipleObjects.restype = wintypes.DWORD
+        handles = (wintypes.HANDLE * 1)(handle)
+        msg = wintypes.MSG()
+        
+        while True:
+            result = user32.MsgWaitForMultipleObjects(1, handles, False, INFINITE, QS_ALLINPUT)
+            if result != WAIT_OBJECT_0 + 1:
+                # 停止イベント、または待機失敗
+                break
+                
+            while user32.PeekMessageW(ctypes.byref(msg), None, 0, 0, PM_REMOVE):
+                user32.TranslateMessage(ctypes.byref(msg))
+                user32.DispatchMessageW(ctypes.byref(msg))
+                
+    def _on_console_ctrl(self, ctrl_type: int) -> int:
+        """コンソール制御ハンドラ: Ctrl+C などで停止イベントをシグナルする"""
+        if ctrl_type in (CTRL_C_EVENT, CTRL_BREAK_EVENT, CTRL_CLOSE_EVENT):
+            print("\n終了中...")
+            self._signal_stop()
+            return 1
+        return 0
+        
+    def _signal_stop(self) -> None:
+        """待機中のメインスレッドを起こす"""
+        self._stop_event.set()
+        handle = self._stop_handle
+        if handle is not None:
+            ctypes.windll.kernel32.SetEvent(ctypes.c_void_p(handle))
+            
     def _cleanup(self):
         """終了時クリーンアップ"""
         self.stop()
@@ -224,6 +427,7 @@ class VoiceInputAgent:
             return
             
         self._running = False
+        self._signal_stop()
         
         if self._recording_toggle and self._recording_toggle.is_recording:
             self._recording_toggle.stop()
@@ -234,6 +438,12 @@ class VoiceInputAgent:
         if self._capture:
             self._capture.stop()
             
+        # キュー済みの発話を処理し終えてから STT ワーカーを終了する
+        if self._stt_worker:
+            self._utterance_queue.put_nowait(None)
+            self._stt_worker.join()
+            self._stt_worker = None
+            
         # 統計表示
         if self._latency_logger:
             stats = self._latency_logger.get_statistics()
@@ -245,6 +455,16 @@ class VoiceInputAgent:
         logger.info("停止完了")
 
 
+def _enable_dpi_awareness() -> None:
+    """プロセスを Per-Monitor DPI 対応にする（Windows 8.1 以降のみ）"""
+    if not hasattr(ctypes, "windll"):
+        return
+    try:
+        ctypes.windll.shcore.SetProcessDpiAwareness(PROCESS_PER_MONITOR_DPI_AWARE)
+    except (AttributeError, OSError):
+        pass
+
+
 def show_devices():
     """デバイス一覧表示"""
     print("利用可能なマイク:")
@@ -265,21 +485,31 @@ def main():
     parser.add_argument("--list-devices", action="store_true")
     parser.add_argument("--model", default="base")
     parser.add_argument("--no-silero", action="store_true")
+    parser.add_argument("--vad-model", default=None, help="Silero VAD の ONNX モデル（int8 量子化済みなど）")
+    parser.add_argument(
+        "--injection-mode",
+        choices=[mode.value for mode in InjectionMode],
+        default=InjectionMode.SEND_INPUT.value
+    )
     args = parser.parse_args()
     
     if args.list_devices:
         show_devices()
         return 0
         
+    _enable_dpi_awareness()
+    
     agent = VoiceInputAgent(
         whisper_model_size=args.model,
-        use_silero_vad=not args.no_silero
+        use_silero_vad=not args.no_silero,
+        vad_model_path=args.vad_model,
+        injection_mode=InjectionMode(args.injection_mode)
     )
     
     try:
         agent.run()
     except Exception as e:
-        logger.error(f"エラー: {e}")
+        logger.error("エラー: %s", e)
         return 1
         
     return 0
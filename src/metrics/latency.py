@@ -4,15 +4,21 @@
 発話終了から SendInput 完了までの時間を ms 単位で記録する。
 """
 
+import math
 import time
 from typing import Optional, List, Dict, Any
 from dataclasses import dataclass, field
 from enum import Enum
 from collections import deque
-import statistics
+from itertools import islice
 import json
 import logging
 
+import numpy as np
+
+
+_NS_PER_MS = 1_000_000  # perf_counter_ns の差分を ms に変換する係数
+
 
 class MeasurementPoint(Enum):
     """計測ポイント"""
@@ -23,9 +29,9 @@ class MeasurementPoint(Enum):
     INJECTION_END = "injection_end"     # テキスト注入完了
 
 
-@dataclass
+@dataclass(slots=True)
 class LatencyMeasurement:
-    """レイテンシ計測結果"""
+    """レイテンシ計測結果（長時間の利用で大量に保持するため __slots__ で軽量化）"""
     speech_end_to_stt_start_ms: float = 0.0
     stt_duration_ms: float = 0.0
     stt_end_to_injection_ms: float = 0.0
@@ -92,8 +98,11 @@ class LatencyTimer:
         measurement = timer.get_measurement(text_length=10)
     """
     
+    __slots__ = ("_timestamps",)
+    
     def __init__(self):
-        self._timestamps: Dict[MeasurementPoint, float] = {}
+        # perf_counter_ns の整数値をそのまま保持し、ms への変換は読み出し時に1回だけ行う
+        self._timestamps: Dict[MeasurementPoint, int] = {}
         
     def mark(self, point: MeasurementPoint) -> None:
         """
@@ -102,7 +111,7 @@ class LatencyTimer:
         Args:
             point: 計測ポイント
         """
-        self._timestamps[point] = time.perf_counter() * 1000  # ms
+        self._timestamps[point] = time.perf_counter_ns()
         
     def reset(self) -> None:
         """タイマーをリセット"""
@@ -120,33 +129,33 @@ class LatencyTimer:
         """
         measurement = LatencyMeasurement(text_length=text_length)
         
-        # 各区間を計算
-        if MeasurementPoint.SPEECH_END in self._timestamps:
-            speech_end = self._timestamps[MeasurementPoint.SPEECH_END]
+        timestamps = self._timestamps
+        speech_end = timestamps.get(MeasurementPoint.SPEECH_END)
+        if speech_end is None:
+            return measurement
             
-            if MeasurementPoint.STT_START in self._timestamps:
-                stt_start = self._timestamps[MeasurementPoint.STT_START]
-                measurement.speech_end_to_stt_start_ms = stt_start - speech_end
+        stt_start = timestamps.get(MeasurementPoint.STT_START)
+        stt_end = timestamps.get(MeasurementPoint.STT_END)
+        injection_start = timestamps.get(MeasurementPoint.INJECTION_START)
+        injection_end = timestamps.get(MeasurementPoint.INJECTION_END)
+        
+        # 各区間は整数 ns の差で求め、最後に ms へ変換する
+        if stt_start is not None:
+            measurement.speech_end_to_stt_start_ms = (stt_start - speech_end) / _NS_PER_MS
+            
+        if stt_end is not None:
+            if stt_start is not None:
+                measurement.stt_duration_ms = (stt_end - stt_start) / _NS_PER_MS
+            if injection_start is not None:
+                measurement.stt_end_to_injection_ms = (injection_start - stt_end) / _NS_PER_MS
                 
-            if MeasurementPoint.STT_END in self._timestamps:
-                stt_end = self._timestamps[MeasurementPoint.STT_END]
-                if MeasurementPoint.STT_START in self._timestamps:
-                    stt_start = self._timestamps[MeasurementPoint.STT_START]
-                    measurement.stt_duration_ms = stt_end - stt_start
-                    
-                if MeasurementPoint.INJECTION_START in self._timestamps:
-                    injection_start = self._timestamps[MeasurementPoint.INJECTION_START]
-                    measurement.stt_end_to_injection_ms = injection_start - stt_end
-                    
-            if MeasurementPoint.INJECTION_END in self._timestamps:
-                injection_end = self._timestamps[MeasurementPoint.INJECTION_END]
-                if MeasurementPoint.INJECTION_START in self._timestamps:
-                    injection_start = self._timestamps[MeasurementPoint.INJECTION_START]
-                    measurement.injection_duration_ms = injection_end - injection_start
-                    
-                # 合計レイテンシ
-                measurement.total_latency_ms = injection_end - speech_end
+        if injection_end is not None:
+            if injection_start is not None:
+                measurement.injection_duration_ms = (injection_end - injection_start) / _NS_PER_MS
                 
+            # 合計レイテンシ
+            measurement.total_latency_ms = (injection_end - speech_end) / _NS_PER_MS
+            
         return measurement
 
 
@@ -166,6 +175,14 @@ class LatencyLogger:
         self._measurements: deque[LatencyMeasurement] = deque(maxlen=max_history)
         self._logger = logging.getLogger(__name__)
         
+        # 合計レイテンシを _measurements と同じ順序で保持するリングバッファ
+        self._latencies = np.zeros(max_history, dtype=np.float64)
+        self._write_index = 0
+        
+        # 履歴内の平均と偏差平方和（Welford 法、追加/削除ごとに O(1) で更新）
+        self._mean = 0.0
+        self._m2 = 0.0
+        
     def log(self, measurement: LatencyMeasurement) -> None:
         """
         計測結果を記録
@@ -173,7 +190,20 @@ class LatencyLogger:
         Args:
             measurement: レイテンシ計測結果
         """
+        latency = measurement.total_latency_ms
+        if len(self._measurements) == self.max_history:
+            # 履歴から押し出される値を統計から取り除く
+            self._remove_from_stats(self._latencies[self._write_index])
+            
         self._measurements.append(measurement)
+        self._latencies[self._write_index] = latency
+        self._write_index = (self._write_index + 1) % self.max_history
+        
+        # 追加後の件数で平均と偏差平方和を更新
+        n = len(self._measurements)
+        delta = latency - self._mean
+        self._mean += delta / n
+        self._m2 += delta * (latency - self._mean)
         
         # ログ出力
         self._logger.info(
@@ -189,24 +219,42 @@ class LatencyLogger:
         Returns:
             レイテンシ統計
         """
-        if not self._measurements:
+        n = len(self._measurements)
+        if n == 0:
             return LatencyStatistics()
             
-        latencies = [m.total_latency_ms for m in self._measurements]
-        sorted_latencies = sorted(latencies)
-        n = len(latencies)
+        # 全体をソートせず、必要な順位だけを1回の introselect で確定させる
+        ranks = sorted({0, (n - 1) // 2, n // 2, int(n * 0.95), int(n * 0.99), n - 1})
+        latencies = np.partition(self._latencies[:n], ranks)
+        max_ms = float(latencies[n - 1])
         
         return LatencyStatistics(
             count=n,
-            mean_ms=statistics.mean(latencies),
-            median_ms=statistics.median(latencies),
-            min_ms=min(latencies),
-            max_ms=max(latencies),
-            stddev_ms=statistics.stdev(latencies) if n > 1 else 0.0,
-            p95_ms=sorted_latencies[int(n * 0.95)] if n >= 20 else max(latencies),
-            p99_ms=sorted_latencies[int(n * 0.99)] if n >= 100 else max(latencies)
+            mean_ms=self._mean,
+            median_ms=float(latencies[(n - 1) // 2] + latencies[n // 2]) / 2,
+            min_ms=float(latencies[0]),
+            max_ms=max_ms,
+            stddev_ms=math.sqrt(max(self._m2, 0.0) / (n - 1)) if n > 1 else 0.0,
+            p95_ms=float(latencies[int(n * 0.95)]) if n >= 20 else max_ms,
+            p99_ms=float(latencies[int(n * 0.99)]) if n >= 100 else max_ms
         )
         
+    def _remove_from_stats(self, latency: float) -> None:
+        """
+        履歴から外れる値を平均と偏差平方和から取り除く
+        
+        Args:
+            latency: 取り除く合計レイテンシ (ms)
+        """
+        n = len(self._measurements) - 1
+        if n == 0:
+            self._mean = 0.0
+            self._m2 = 0.0
+            return
+        delta = latency - self._mean
+        self._mean -= delta / n
+        self._m2 -= delta * (latency - self._mean)
+        
     def get_recent(self, count: int = 10) -> List[LatencyMeasurement]:
         """
         直近の計測結果を取得
@@ -217,11 +265,17 @@ class LatencyLogger:
         Returns:
             計測結果のリスト
         """
-        return list(self._measurements)[-count:]
+        # 末尾から count 件だけをたどる（履歴全体をリストにコピーしない）
+        recent = list(islice(reversed(self._measurements), max(0, count)))
+        recent.reverse()
+        return recent
         
     def clear(self) -> None:
         """履歴をクリア"""
         self._measurements.clear()
+        self._write_index = 0
+        self._mean = 0.0
+        self._m2 = 0.0
         
     def export_json(self) -> str:
         """
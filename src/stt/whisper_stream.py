@@ -5,8 +5,9 @@ faster-whisper (CTranslate2 バックエンド) を使用した逐次文字起
 INT8 量子化モデルで高速かつ低リソースな推論を実現。
 """
 
+import os
 import numpy as np
-from typing import Optional, Iterator, List, Callable
+from typing import Optional, Iterator, List, Callable, Union
 from dataclasses import dataclass
 from enum import Enum
 import threading
@@ -14,6 +15,30 @@ import queue
 import time
 
 
+# int16 → float32 正規化の係数（配列と同じ float32 にしておき、float64 への昇格を避ける）
+_INV_INT16 = np.float32(1.0 / 32768.0)
+
+
+def _as_int16(audio: Union[bytes, np.ndarray]) -> np.ndarray:
+    """
+    16bit PCM を int16 配列として参照する（コピーなし）
+    
+    Args:
+        audio: 16bit PCM バイト列、または int16 配列
+        
+    Returns:
+        int16 配列（int16 配列が渡された場合はそのまま）
+        
+    Raises:
+        TypeError: int16 以外の配列が渡された場合（float 配列を PCM として扱わない）
+    """
+    if isinstance(audio, np.ndarray):
+        if audio.dtype != np.int16:
+            raise TypeError(f"int16 配列が必要です（dtype={audio.dtype}）")
+        return audio
+    return np.frombuffer(audio, dtype=np.int16)
+
+
 class TranscriptionState(Enum):
     """文字起こし状態"""
     IDLE = "idle"
@@ -21,7 +46,7 @@ class TranscriptionState(Enum):
     COMPLETED = "completed"
 
 
-@dataclass
+@dataclass(slots=True)
 class TranscriptionSegment:
     """文字起こしセグメント"""
     text: str
@@ -31,7 +56,7 @@ class TranscriptionSegment:
     is_final: bool  # 確定かどうか
 
 
-@dataclass
+@dataclass(slots=True)
 class TranscriptionResult:
     """文字起こし結果"""
     text: str
@@ -55,70 +80,199 @@ class WhisperStreamProcessor:
     SAMPLE_RATE = 16000
     CHUNK_DURATION_S = 0.5  # チャンク長（秒）
     MIN_AUDIO_DURATION_S = 0.5  # 最小音声長（秒）
+    LARGE_MODEL_PREFIXES = ("medium", "large", "distil-large")  # 重みの転送量が支配的なモデル
+    NO_SPACE_LANGUAGES = frozenset({"ja", "zh"})  # 単語間を空白で区切らない言語
+    GREEDY_MAX_DURATION_S = 2.0  # これより短い発話はビームサーチせず greedy で復号
+    COMPUTE_TYPES = frozenset({
+        "auto", "default", "int8", "int8_float32", "int8_float16", "int8_bfloat16",
+        "int16", "float16", "bfloat16", "float32"
+    })  # CTranslate2 が受け付ける計算精度
     
     def __init__(
         self,
         model_size: str = "base",
         device: str = "cpu",
-        compute_type: str = "int8",
+        compute_type: str = "auto",
         language: str = "ja",
-        beam_size: int = 5
+        beam_size: int = 5,
+        cpu_threads: int = 0,
+        num_workers: int = 1
     ):
         """
         Args:
             model_size: モデルサイズ (tiny, base, small, medium, large-v2, large-v3)
             device: デバイス (cpu, cuda)
-            compute_type: 計算精度 (int8, float16, float32)
+            compute_type: 計算精度 (auto, int8, int8_float16, float16, float32)。
+                          auto の場合はモデルサイズとデバイスから選ぶ。
             language: 言語コード
             beam_size: ビームサーチのビーム数
+            cpu_threads: CPU 推論のスレッド数。0 の場合は CPU 推論で物理コア数（SMT の兄弟スレッドや
+                         キャプチャ・STT の Python スレッドと競合させない）。
+            num_workers: CTranslate2 のワーカー数。transcribe() を複数スレッドから同時に呼ぶ場合だけ 2 以上にする。
+                         既定の 1 は1スレッドからの逐次呼び出し専用で、変換バッファをインスタンス内で使い回す。
+            
+        Raises:
+            ValueError: 未対応の compute_type が指定された場合
         """
+        if compute_type not in self.COMPUTE_TYPES:
+            raise ValueError(f"未対応の compute_type: {compute_type}")
+            
         self.model_size = model_size
         self.device = device
-        self.compute_type = compute_type
+        self.compute_type = self._resolve_compute_type(compute_type, model_size, device)
         self.language = language
         self.beam_size = beam_size
+        self.cpu_threads = cpu_threads
+        if cpu_threads == 0 and device == "cpu":
+            self.cpu_threads = self._physical_core_count()
+        self.num_workers = num_workers
         
         self._model = None
+        self._warmed = False
         self._state = TranscriptionState.IDLE
+        self._float_buffer = np.empty(0, dtype=np.float32)  # _bytes_to_float32 の出力を使い回す
+        
+    @classmethod
+    def _is_large_model(cls, model_size: str) -> bool:
+        """medium 以上のモデルかどうか"""
+        return model_size.startswith(cls.LARGE_MODEL_PREFIXES)
+        
+    @staticmethod
+    def _physical_core_count() -> int:
+        """物理コア数（論理コアの半分とみなす。SMT 無効の環境では少なめになる）"""
+        return max(1, (os.cpu_count() or 2) // 2)
+        
+    @classmethod
+    def _resolve_compute_type(cls, compute_type: str, model_size: str, device: str) -> str:
+        """
+        compute_type="auto" を実際の計算精度に解決する
+        
+        CTranslate2 の CPU 推論で使える最小の重み形式は int8 なので、CPU では常に int8。
+        GPU では medium 以上を int8_float16（重みは int8、演算は float16）にして重みの転送量を半減させる。
+        
+        Args:
+            compute_type: 指定された計算精度
+            model_size: モデルサイズ
+            device: デバイス
+            
+        Returns:
+            CTranslate2 に渡す計算精度
+        """
+        if compute_type != "auto":
+            return compute_type
+        if device == "cpu":
+            return "int8"
+        return "int8_float16" if cls._is_large_model(model_size) else "float16"
         
     def _load_model(self):
         """モデルをロード"""
         if self._model is None:
             from faster_whisper import WhisperModel
+            from huggingface_hub.utils import LocalEntryNotFoundError
             import logging
             logger = logging.getLogger(__name__)
             
-            logger.info(f"Whisper モデルをロード中: {self.model_size}")
-            self._model = WhisperModel(
-                self.model_size,
-                device=self.device,
-                compute_type=self.compute_type
-            )
+            logger.info("Whisper モデルをロード中: %s", self.model_size)
+            try:
+                # キャッシュ済みならハブへの更新確認（ネットワーク往復）をせずにロードする
+                self._model = WhisperModel(
+                    self.model_size,
+                    device=self.device,
+                    compute_type=self.compute_type,
+                    cpu_threads=self.cpu_threads,
+                    num_workers=self.num_workers,
+                    local_files_only=True
+                )
+            except LocalEntryNotFoundError:
+                # キャッシュ未取得の場合のみダウンロードする（CUDA・compute_type・メモリ不足などのエラーはそのまま送出）
+                logger.info("キャッシュにモデルがないためダウンロードします")
+                self._model = WhisperModel(
+                    self.model_size,
+                    device=self.device,
+                    compute_type=self.compute_type,
+                    cpu_threads=self.cpu_threads,
+                    num_workers=self.num_workers
+                )
             logger.info("Whisper モデルのロード完了")
             
     def preload(self) -> None:
         """モデルを事前ロード（起動時に呼び出す）"""
         self._load_model()
+        
+    def warmup(self, duration_s: float = 3.0) -> None:
+        """
+        無音で1回推論し、初回推論時のカーネル選択などを起動時に済ませる（2回目以降は何もしない）
+        
+        Args:
+            duration_s: ウォームアップに使う無音の長さ（秒）
+        """
+        self._load_model()
+        if self._warmed:
+            return
+            
+        silence = np.zeros(int(self.SAMPLE_RATE * duration_s), dtype=np.float32)
+        # 本番と同じ復号設定で実行し、実際に使う経路を温める
+        segments, _ = self._model.transcribe(silence, **self._decode_options(len(silence)))
+        # セグメントはジェネレータなので、最後まで消費して推論を実行させる
+        for _ in segments:
+            pass
+        self._warmed = True
+            
+    def _decode_options(self, num_samples: int) -> dict:
+        """
+        faster-whisper の transcribe() に渡す復号設定
+        
+        Args:
+            num_samples: 音声のサンプル数（16kHz）
             
-    def _bytes_to_float32(self, audio_bytes: bytes) -> np.ndarray:
+        Returns:
+            transcribe() のキーワード引数
+        """
+        # 短い発話は候補が少なくビームサーチの効果が小さいため greedy で復号する
+        beam_size = self.beam_size
+        if num_samples < self.SAMPLE_RATE * self.GREEDY_MAX_DURATION_S:
+            beam_size = 1
+        return {
+            "language": self.language,
+            "beam_size": beam_size,
+            "temperature": 0.0,  # 温度フォールバックによる再復号をしない
+            "condition_on_previous_text": False,  # 前セグメントの誤りを引き継がない
+            "vad_filter": False,  # 外部 VAD を使用
+            "without_timestamps": True  # タイムスタンプトークンを復号しない（テキストのみ使用）
+        }
+        
+    def _bytes_to_float32(self, audio_bytes: Union[bytes, np.ndarray]) -> np.ndarray:
         """
         int16 バイト列を float32 配列に変換
         
         Args:
-            audio_bytes: 16bit PCM バイト列
+            audio_bytes: 16bit PCM バイト列、または int16 配列
             
         Returns:
-            -1.0 から 1.0 の範囲の float32 配列
+            -1.0 から 1.0 の範囲の float32 配列。num_workers が 1 の場合は内部バッファのビューで、
+            次の呼び出しで上書きされる（2 以上の場合は呼び出しごとに新しい配列）
+            
+        Raises:
+            TypeError: int16 以外の配列が渡された場合
         """
-        samples = np.frombuffer(audio_bytes, dtype=np.int16)
-        return samples.astype(np.float32) / 32768.0
+        samples = _as_int16(audio_bytes)
+        if self.num_workers > 1:
+            # 複数スレッドから同時に呼ばれうるため、共有バッファを使わない
+            return np.multiply(samples, _INV_INT16)
+        n = len(samples)
+        if n > len(self._float_buffer):
+            self._float_buffer = np.empty(n, dtype=np.float32)
+        out = self._float_buffer[:n]
+        # int16 → float32 の変換とスケーリングを1パスで行う
+        np.multiply(samples, _INV_INT16, out=out)
+        return out
         
-    def transcribe(self, audio_data: bytes) -> TranscriptionResult:
+    def transcribe(self, audio_data: Union[bytes, np.ndarray]) -> TranscriptionResult:
         """
         音声データを文字起こし
         
         Args:
-            audio_data: 16kHz/mono/16bit PCM のバイト列
+            audio_data: 16kHz/mono/16bit PCM のバイト列、または int16 配列
             
         Returns:
             文字起こし結果
@@ -144,11 +298,7 @@ class WhisperStreamProcessor:
             
         # 推論実行
         segments_gen, info = self._model.transcribe(
-            audio_float,
-            language=self.language,
-            beam_size=self.beam_size,
-            vad_filter=False,  # 外部 VAD を使用
-            without_timestamps=False
+            audio_float, **self._decode_options(len(audio_float))
         )
         
         # セグメントを収集
@@ -156,23 +306,28 @@ class WhisperStreamProcessor:
         full_text = []
         
         for segment in segments_gen:
+            # segment.text はプロパティ経由の場合もあるので、取り出しと strip は1回にする
+            text = segment.text.strip()
             seg = TranscriptionSegment(
-                text=segment.text.strip(),
+                text=text,
                 start=segment.start,
                 end=segment.end,
                 confidence=segment.avg_logprob,
                 is_final=True
             )
             segments.append(seg)
-            full_text.append(segment.text.strip())
+            full_text.append(text)
             
         end_time = time.perf_counter()
         processing_time_ms = (end_time - start_time) * 1000
         
         self._state = TranscriptionState.COMPLETED
         
+        # 日本語などはセグメント間に空白を入れずに連結する
+        separator = "" if info.language in self.NO_SPACE_LANGUAGES else " "
+        
         return TranscriptionResult(
-            text=" ".join(full_text),
+            text=separator.join(full_text),
             segments=segments,
             language=info.language,
             language_probability=info.language_probability,
@@ -196,16 +351,20 @@ class WhisperStreamProcessor:
         """
         self._load_model()
         
-        buffer = b""
+        buffer = bytearray()
         chunk_size = int(self.SAMPLE_RATE * self.CHUNK_DURATION_S * 2)  # 16bit = 2 bytes
         
         for audio_chunk in audio_iterator:
             buffer += audio_chunk
-            
-            # チャンクサイズに達したら処理
-            while len(buffer) >= chunk_size:
-                chunk = buffer[:chunk_size]
-                buffer = buffer[chunk_size:]
+            if len(buffer) < chunk_size:
+                continue
+                
+            # チャンクサイズに達した分を処理し、消費した分だけ最後にまとめて先頭から削除する
+            # （チャンクごとに残りのバッファを作り直さない）
+            consumed = 0
+            while len(buffer) - consumed >= chunk_size:
+                chunk = buffer[consumed:consumed + chunk_size]
+                consumed += chunk_size
                 
                 result = self.transcribe(chunk)
                 
@@ -215,6 +374,8 @@ class WhisperStreamProcessor:
                 if result.text:
                     yield result
                     
+            del buffer[:consumed]
+            
         # 残りのバッファを処理
         if len(buffer) > 0:
             result = self.transcribe(buffer)
@@ -253,54 +414,102 @@ class AudioAccumulator:
         self.max_duration_s = max_duration_s
         self.sample_rate = sample_rate
         
-        self._buffer: bytearray = bytearray()
+        # 最大長分の int16 バッファを確保し、書き込み位置だけを進める
+        self._max_samples = int(max_duration_s * sample_rate)
+        self._samples = np.empty(self._max_samples, dtype=np.int16)
+        self._length = 0
         self._is_accumulating = False
         
-    def add(self, audio_chunk: bytes, is_speech: bool) -> Optional[bytes]:
+        # VAD 入力用の float32 バッファ（feed_with_vad でチャンクごとに確保しない）
+        self._vad_buffer = np.empty(0, dtype=np.float32)
+        
+    def feed_with_vad(self, audio_chunk: np.ndarray, vad) -> Optional[np.ndarray]:
+        """
+        VAD 判定と蓄積を1回の呼び出しで行う
+        
+        int16 チャンクを事前確保したバッファ上で1回だけ正規化 float32 に変換して VAD に渡し、
+        同じチャンクをそのまま蓄積する。
+        
+        Args:
+            audio_chunk: 16kHz/mono の int16 配列
+            vad: is_speech_float32() を持つ VAD（SileroVAD / SimpleEnergyVAD）
+            
+        Returns:
+            蓄積完了した音声データ、または None
+            
+        Raises:
+            TypeError: int16 以外の配列が渡された場合
+        """
+        audio_chunk = _as_int16(audio_chunk)
+        n = len(audio_chunk)
+        if n > len(self._vad_buffer):
+            self._vad_buffer = np.empty(n, dtype=np.float32)
+        samples = self._vad_buffer[:n]
+        np.multiply(audio_chunk, _INV_INT16, out=samples)
+        
+        return self.add(audio_chunk, vad.is_speech_float32(samples))
+        
+    def add(self, audio_chunk: Union[bytes, np.ndarray], is_speech: bool) -> Optional[np.ndarray]:
         """
         音声チャンクを追加
         
         Args:
-            audio_chunk: 音声データ
+            audio_chunk: 音声データ（16bit PCM バイト列、または int16 配列）
             is_speech: VAD による音声判定
             
         Returns:
-            蓄積完了した音声データ、または None
+            蓄積完了した音声データ（int16 配列）、または None
         """
         if is_speech:
-            self._buffer.extend(audio_chunk)
+            samples = _as_int16(audio_chunk)
+                
+            start = self._length
+            end = start + len(samples)
+            if end > len(self._samples):
+                # 最大長をまたぐチャンクのときだけ拡張する
+                grown = np.empty(end, dtype=np.int16)
+                grown[:start] = self._samples[:start]
+                self._samples = grown
+            self._samples[start:end] = samples
+            self._length = end
             self._is_accumulating = True
             
             # 最大長チェック
-            max_bytes = int(self.max_duration_s * self.sample_rate * 2)
-            if len(self._buffer) >= max_bytes:
-                result = bytes(self._buffer)
-                self._buffer.clear()
-                self._is_accumulating = False
-                return result
+            if end >= self._max_samples:
+                return self._take()
                 
         else:
-            if self._is_accumulating and len(self._buffer) > 0:
+            if self._is_accumulating and self._length > 0:
                 # 無音検出：蓄積した音声を返す
-                result = bytes(self._buffer)
-                self._buffer.clear()
-                self._is_accumulating = False
-                return result
+                return self._take()
                 
         return None
         
-    def flush(self) -> Optional[bytes]:
+    def _take(self) -> np.ndarray:
+        """
+        蓄積した音声を取り出す
+        
+        コピーせずにバッファのビューをそのまま返し、次の発話には新しいバッファを使う
+        （返した配列は STT ワーカーで処理中でも上書きされない）。
+        
+        Returns:
+            蓄積した音声データ（int16 配列）
+        """
+        result = self._samples[:self._length]
+        self._samples = np.empty(self._max_samples, dtype=np.int16)
+        self._length = 0
+        self._is_accumulating = False
+        return result
+        
+    def flush(self) -> Optional[np.ndarray]:
         """蓄積中のデータを強制的に返す"""
-        if len(self._buffer) > 0:
-            result = bytes(self._buffer)
-            self._buffer.clear()
-            self._is_accumulating = False
-            return result
+        if self._length > 0:
+            return self._take()
         return None
         
     def clear(self):
         """バッファをクリア"""
-        self._buffer.clear()
+        self._length = 0
         self._is_accumulating = False
         
     @property
@@ -311,4 +520,4 @@ class AudioAccumulator:
     @property
     def duration_s(self) -> float:
         """蓄積中の音声の長さ（秒）"""
-        return len(self._buffer) / (self.sample_rate * 2)
+        return self._length / self.sample_rate
@@ -1,5 +1,5 @@
 """VAD モジュール"""
 
-from .silero_vad import SileroVAD, SimpleEnergyVAD, VADResult, VoiceState
+from .silero_vad import SileroVAD, SimpleEnergyVAD, VADResult, VoiceState, quantize_onnx_model
 
-__all__ = ["SileroVAD", "SimpleEnergyVAD", "VADResult", "VoiceState"]
+__all__ = ["SileroVAD", "SimpleEnergyVAD", "VADResult", "VoiceState", "quantize_onnx_model"]
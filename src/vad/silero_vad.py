@@ -5,12 +5,44 @@ Silero Voice Activity Detection を使用して音声区間を検出する。
 無音区間を除外することで推論負荷を削減し、幻覚を防止する。
 """
 
-import torch
+import logging
+import math
 import numpy as np
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Sequence, Union, TYPE_CHECKING
 from dataclasses import dataclass
 from enum import Enum
 
+if TYPE_CHECKING:
+    import torch
+else:
+    # SileroVAD の初期化時にインポートする（SimpleEnergyVAD / VADResult だけなら torch は不要）
+    torch = None
+
+logger = logging.getLogger(__name__)
+
+# int16 → float32 正規化の係数（配列と同じ float32 にしておき、float64 への昇格を避ける）
+_INV_INT16 = np.float32(1.0 / 32768.0)
+
+
+def _as_int16(audio_chunk: Union[bytes, memoryview, np.ndarray]) -> np.ndarray:
+    """
+    16bit PCM を int16 配列として参照する（コピーなし）
+    
+    Args:
+        audio_chunk: 16bit PCM のバイト列・memoryview、または int16 配列
+        
+    Returns:
+        int16 配列（int16 配列が渡された場合はそのまま）
+        
+    Raises:
+        TypeError: int16 以外の配列が渡された場合（バイト列として再解釈しない）
+    """
+    if isinstance(audio_chunk, np.ndarray):
+        if audio_chunk.dtype != np.int16:
+            raise TypeError(f"int16 配列が必要です（dtype={audio_chunk.dtype}）")
+        return audio_chunk
+    return np.frombuffer(audio_chunk, dtype=np.int16)
+
 
 class VoiceState(Enum):
     """音声状態"""
@@ -26,6 +58,107 @@ class VADResult:
     state: VoiceState
 
 
+def _import_torch() -> None:
+    """torch をインポートしてモジュール変数に設定する（2回目以降は sys.modules から取得するだけ）"""
+    global torch
+    import torch
+
+
+class _OnnxSileroModel:
+    """
+    ONNX Runtime で Silero VAD を実行するバックエンド
+    
+    入力・状態・出力のバッファを事前確保して IoBinding で束縛し、推論ごとの確保をなくす。
+    JIT モデルと同じく model(frame, sample_rate) で音声確率のテンソルを返す。
+    v4（h/c の状態）と v5（state + 直前 64 サンプルのコンテキスト）のモデルに対応。
+    """
+    
+    V5_CONTEXT_SAMPLES = 64
+    
+    def __init__(self, path: str, chunk_samples: int, sample_rate: int):
+        """
+        Args:
+            path: ONNX モデルのパス
+            chunk_samples: 1フレームのサンプル数
+            sample_rate: サンプルレート
+            
+        Raises:
+            ImportError: onnxruntime がインストールされていない場合
+        """
+        import onnxruntime as ort
+        
+        # チャンクが小さいためスレッド数 1・逐次実行のセッション
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = 1
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        # LSTM まわりの小さな演算を融合させる
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = ort.InferenceSession(
+            path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        
+        input_names = {i.name for i in self._session.get_inputs()}
+        if "state" in input_names:
+            self._context = self.V5_CONTEXT_SAMPLES
+            states = {"state": "stateN"}
+            state_shape = (2, 1, 128)
+        else:
+            self._context = 0
+            states = {"h": "hn", "c": "cn"}
+            state_shape = (2, 1, 64)
+            
+        self._input = np.zeros((1, self._context + chunk_samples), dtype=np.float32)
+        self._sr = np.array(sample_rate, dtype=np.int64)
+        self._output = np.zeros((1, 1), dtype=np.float32)
+        # 推論後に出力側の状態を入力側へコピーする（入力, 出力）の組
+        self._states = [
+            (np.zeros(state_shape, dtype=np.float32), np.zeros(state_shape, dtype=np.float32))
+            for _ in states
+        ]
+        
+        # CPU 上の OrtValue は NumPy 配列とメモリを共有するため、束縛は一度だけでよい
+        io = self._session.io_binding()
+        io.bind_ortvalue_input("input", ort.OrtValue.ortvalue_from_numpy(self._input))
+        io.bind_ortvalue_input("sr", ort.OrtValue.ortvalue_from_numpy(self._sr))
+        io.bind_ortvalue_output("output", ort.OrtValue.ortvalue_from_numpy(self._output))
+        for (name, out_name), (state_in, state_out) in zip(states.items(), self._states):
+            io.bind_ortvalue_input(name, ort.OrtValue.ortvalue_from_numpy(state_in))
+            io.bind_ortvalue_output(out_name, ort.OrtValue.ortvalue_from_numpy(state_out))
+        self._io = io
+        
+    def __call__(self, frame: "torch.Tensor", sample_rate: int) -> "torch.Tensor":
+        """
+        1フレームを推論
+        
+        Args:
+            frame: 1フレーム分の float32 テンソル
+            sample_rate: サンプルレート（セッション作成時の値を使用）
+            
+        Returns:
+            音声確率（形状 [1, 1]）
+        """
+        buf = self._input[0]
+        context = self._context
+        if context:
+            # v5 は直前フレームの末尾をコンテキストとして先頭に付ける
+            buf[:context] = buf[-context:]
+        buf[context:] = frame.numpy().reshape(-1)
+        
+        self._session.run_with_iobinding(self._io)
+        
+        for state_in, state_out in self._states:
+            np.copyto(state_in, state_out)
+        # 出力バッファは次の推論で上書きされるため、値を取り出して返す
+        return torch.tensor(self._output)
+        
+    def reset_states(self) -> None:
+        """内部状態をリセット"""
+        self._input.fill(0.0)
+        for state_in, _ in self._states:
+            state_in.fill(0.0)
+
+
 class SileroVAD:
     """
     Silero VAD ラッパー
@@ -40,33 +173,61 @@ class SileroVAD:
     # Silero VAD の要件
     SAMPLE_RATE = 16000
     CHUNK_SAMPLES = 512  # Silero VAD は 512 サンプル (32ms @ 16kHz) を要求
+    FRAME_DURATION_MS = CHUNK_SAMPLES / SAMPLE_RATE * 1000
     
     def __init__(
         self,
         threshold: float = 0.5,
         min_speech_duration_ms: int = 250,
-        min_silence_duration_ms: int = 100
+        min_silence_duration_ms: int = 100,
+        model_path: Optional[str] = None,
+        silence_floor: float = 10 / 32768
     ):
         """
         Args:
             threshold: 音声判定の閾値 (0.0-1.0)
             min_speech_duration_ms: 音声開始と判定するまでの最小持続時間 (ms)
             min_silence_duration_ms: 無音と判定するまでの最小持続時間 (ms)
+            model_path: ONNX モデルのパス（quantize_onnx_model で作成した int8 モデルなど）。
+                        None の場合は torch.hub の JIT モデルを使用。
+            silence_floor: このピーク振幅未満のフレームは推論せず確率 0 とみなす（0 で無効）
+            
+        Raises:
+            ImportError: torch がインストールされていない場合
         """
+        _import_torch()
+        
         self.threshold = threshold
         self.min_speech_duration_ms = min_speech_duration_ms
         self.min_silence_duration_ms = min_silence_duration_ms
+        self.model_path = model_path
+        self.silence_floor = silence_floor
+        
+        # 持続時間の閾値はフレーム数に換算しておく（frames * 32ms >= 閾値 と同値）
+        self._min_speech_frames = math.ceil(min_speech_duration_ms / self.FRAME_DURATION_MS)
+        self._min_silence_frames = math.ceil(min_silence_duration_ms / self.FRAME_DURATION_MS)
         
-        self._model: Optional[torch.nn.Module] = None
+        self._model: Optional["torch.nn.Module"] = None
         self._state: VoiceState = VoiceState.SILENCE
         self._speech_frames: int = 0
         self._silence_frames: int = 0
         
-        # バッファ（512 サンプル未満のチャンクを蓄積）
-        self._buffer: np.ndarray = np.array([], dtype=np.float32)
+        # 512 サンプルに満たない端数を次のチャンクまで持ち越す固定長バッファ
+        self._buffer: np.ndarray = np.zeros(self.CHUNK_SAMPLES, dtype=np.float32)
+        self._buffer_len = 0
+        # 同じメモリを共有する [1, 512] のテンソル（端数から組み立てたフレームの推論で毎回作らない）
+        self._buffer_frames = torch.from_numpy(self._buffer).view(1, self.CHUNK_SAMPLES)
+        # _bytes_to_float の出力先（process_float32 は内容をコピーして使うため再利用できる）
+        self._float_buffer: np.ndarray = np.empty(0, dtype=np.float32)
         
     def _load_model(self) -> None:
         """Silero VAD モデルをロード"""
+        if self._model is None and self.model_path is not None:
+            try:
+                self._model = _OnnxSileroModel(self.model_path, self.CHUNK_SAMPLES, self.SAMPLE_RATE)
+            except ImportError:
+                logger.warning("onnxruntime が見つからないため PyTorch の Silero VAD を使用")
+                
         if self._model is None:
             self._model, _ = torch.hub.load(
                 repo_or_dir='snakers4/silero-vad',
@@ -76,119 +237,244 @@ class SileroVAD:
             )
             self._model.eval()
             
+            # 512 サンプルの推論はスレッドの起動・同期のコストの方が大きいため単一スレッドで実行する
+            # （torch はこのプロセスでは VAD にしか使わない。faster-whisper は CTranslate2 のスレッドを使う）
+            torch.set_num_threads(1)
+            try:
+                torch.set_num_interop_threads(1)
+            except RuntimeError:
+                # 並列処理が既に始まっている場合は変更できない
+                pass
+                
     def reset(self) -> None:
         """内部状態をリセット"""
         self._state = VoiceState.SILENCE
         self._speech_frames = 0
         self._silence_frames = 0
-        self._buffer = np.array([], dtype=np.float32)
+        self._buffer_len = 0
         if self._model is not None:
             self._model.reset_states()
             
-    def _bytes_to_float(self, audio_bytes: bytes) -> np.ndarray:
+    def _bytes_to_float(self, audio_bytes: Union[bytes, memoryview, np.ndarray]) -> np.ndarray:
         """
         int16 バイト列を float32 配列に変換
         
         Args:
-            audio_bytes: 16bit PCM バイト列
+            audio_bytes: 16bit PCM バイト列、または int16 配列
             
         Returns:
-            -1.0 から 1.0 の範囲の float32 配列
+            -1.0 から 1.0 の範囲の float32 配列（内部バッファのビュー。次の呼び出しで上書きされる）
         """
-        samples = np.frombuffer(audio_bytes, dtype=np.int16)
-        return samples.astype(np.float32) / 32768.0
+        samples = _as_int16(audio_bytes)
+        n = len(samples)
+        if n > len(self._float_buffer):
+            self._float_buffer = np.empty(n, dtype=np.float32)
+        out = self._float_buffer[:n]
+        # int16 → float32 の変換とスケーリングを1パスで行う（中間配列・出力の確保なし）
+        np.multiply(samples, _INV_INT16, out=out)
+        return out
         
-    def process(self, audio_chunk: bytes) -> List[VADResult]:
+    def process(self, audio_chunk: Union[bytes, memoryview, np.ndarray]) -> List[VADResult]:
         """
         音声チャンクを処理して VAD 結果を返す
         
         Args:
-            audio_chunk: 16kHz/mono/16bit PCM のバイト列
+            audio_chunk: 16kHz/mono/16bit PCM のバイト列、または int16 配列（配列はコピーせずに参照）
             
         Returns:
             VAD 結果のリスト（512 サンプルごとに1つ）
         """
-        self._load_model()
+        return self.process_float32(self._bytes_to_float(audio_chunk))
         
-        # バイト列を float32 に変換
-        samples = self._bytes_to_float(audio_chunk)
+    def process_float32(self, samples: np.ndarray) -> List[VADResult]:
+        """
+        正規化済みの float32 サンプルを処理して VAD 結果を返す
         
-        # バッファに追加
-        self._buffer = np.concatenate([self._buffer, samples])
+        呼び出し元で int16 → float32 変換を済ませている場合に使用する（再変換なし）。
+        samples は内部バッファへコピーされるため、呼び出し後に再利用してよい。
         
-        results = []
+        Args:
+            samples: -1.0 から 1.0 の範囲の float32 配列
+            
+        Returns:
+            VAD 結果のリスト（512 サンプルごとに1つ）
+        """
+        confidences = self._infer(samples)
+        flags = self._advance(confidences)
+        speech, silence = VoiceState.SPEECH, VoiceState.SILENCE
+        return [
+            VADResult(is_speech=flag, confidence=confidence, state=speech if flag else silence)
+            for flag, confidence in zip(flags, confidences)
+        ]
+        
+    def process_events(self, audio_chunk: Union[bytes, memoryview, np.ndarray]) -> List[VADResult]:
+        """
+        音声チャンクを処理して状態が変化したフレームの結果だけを返す
         
-        # 512 サンプルずつ処理
-        while len(self._buffer) >= self.CHUNK_SAMPLES:
-            chunk = self._buffer[:self.CHUNK_SAMPLES]
-            self._buffer = self._buffer[self.CHUNK_SAMPLES:]
+        Args:
+            audio_chunk: 16kHz/mono/16bit PCM のバイト列、または int16 配列（配列はコピーせずに参照）
             
-            result = self._process_chunk(chunk)
-            results.append(result)
+        Returns:
+            状態遷移した時点の VAD 結果のリスト（変化がなければ空）
+        """
+        return self.process_events_float32(self._bytes_to_float(audio_chunk))
+        
+    def process_events_float32(self, samples: np.ndarray) -> List[VADResult]:
+        """
+        正規化済みの float32 サンプルを処理して状態が変化したフレームの結果だけを返す
+        
+        Args:
+            samples: -1.0 から 1.0 の範囲の float32 配列
             
-        return results
+        Returns:
+            状態遷移した時点の VAD 結果のリスト（変化がなければ空）
+        """
+        prev = self._state == VoiceState.SPEECH
+        confidences = self._infer(samples)
+        events = []
+        for flag, confidence in zip(self._advance(confidences), confidences):
+            if flag != prev:
+                events.append(VADResult(
+                    is_speech=flag,
+                    confidence=confidence,
+                    state=VoiceState.SPEECH if flag else VoiceState.SILENCE
+                ))
+                prev = flag
+        return events
         
-    def _process_chunk(self, samples: np.ndarray) -> VADResult:
+    def _infer(self, samples: np.ndarray) -> List[float]:
         """
-        512 サンプルのチャンクを処理
+        512 サンプルのフレームに区切って推論し、音声確率を返す
+        
+        512 サンプル未満の端数は次の呼び出しへ持ち越す。
         
         Args:
-            samples: float32 配列 (長さ 512)
+            samples: -1.0 から 1.0 の範囲の float32 配列
             
         Returns:
-            VAD 結果
+            フレームごとの音声確率
         """
-        # PyTorch テンソルに変換
-        tensor = torch.from_numpy(samples)
+        self._load_model()
         
-        # 推論
-        with torch.no_grad():
-            confidence = self._model(tensor, self.SAMPLE_RATE).item()
+        chunk = self.CHUNK_SAMPLES
+        confidences: List[float] = []
+        
+        # 前回の端数があれば、先頭から補って1フレーム分にしてから処理する
+        pending = self._buffer_len
+        if pending:
+            take = min(chunk - pending, len(samples))
+            self._buffer[pending:pending + take] = samples[:take]
+            pending += take
+            samples = samples[take:]
+            if pending < chunk:
+                self._buffer_len = pending
+                return confidences
+            confidences.extend(self._infer_frames(self._buffer_frames))
             
-        # 閾値判定
-        is_speech_frame = confidence >= self.threshold
+        # 残りは samples 上のビューのまま処理する（連結・コピーなし）
+        frame_count = len(samples) // chunk
+        if frame_count:
+            block = np.ascontiguousarray(samples[:frame_count * chunk])
+            confidences.extend(self._infer_frames(torch.from_numpy(block).view(frame_count, chunk)))
+            
+        # 512 サンプル未満の端数は固定長バッファへ持ち越す（samples は呼び出し元で再利用されるため）
+        tail = len(samples) - frame_count * chunk
+        self._buffer[:tail] = samples[frame_count * chunk:]
+        self._buffer_len = tail
         
-        # 状態遷移ロジック
-        if is_speech_frame:
-            self._speech_frames += 1
-            self._silence_frames = 0
-        else:
-            self._silence_frames += 1
-            self._speech_frames = 0
+        return confidences
+        
+    def _infer_frames(self, frames: "torch.Tensor") -> List[float]:
+        """
+        フレームを順に推論
+        
+        Args:
+            frames: [フレーム数, 512] の float32 テンソル（NumPy 配列のビュー）
+            
+        Returns:
+            音声確率のリスト（フレームごとに1つ）
+        """
+        # ピーク振幅が下限未満のフレームはモデルを通さず確率 0 とする（無音区間の推論を省く）
+        peaks = frames.abs().amax(dim=1).tolist()
+        floor = self.silence_floor
+        active = [i for i, peak in enumerate(peaks) if peak >= floor]
+        confidences = [0.0] * len(peaks)
+        if not active:
+            return confidences
             
-        # フレーム数から持続時間を計算
-        frame_duration_ms = (self.CHUNK_SAMPLES / self.SAMPLE_RATE) * 1000
-        speech_duration_ms = self._speech_frames * frame_duration_ms
-        silence_duration_ms = self._silence_frames * frame_duration_ms
+        # no_grad の出入りはまとめて1回にする
+        # （Silero はフレーム間で内部状態を持つため、バッチ次元には積まずに順に推論する）
+        model = self._model
+        with torch.no_grad():
+            outputs = [model(frames[i], self.SAMPLE_RATE) for i in active]
+        # 確率の取り出しはフレームごとの .item() ではなく最後に1回で行う
+        for i, confidence in zip(active, torch.stack(outputs).flatten().tolist()):
+            confidences[i] = confidence
+        return confidences
         
-        # 状態更新
-        if self._state == VoiceState.SILENCE:
-            if speech_duration_ms >= self.min_speech_duration_ms:
-                self._state = VoiceState.SPEECH
-        else:  # VoiceState.SPEECH
-            if silence_duration_ms >= self.min_silence_duration_ms:
-                self._state = VoiceState.SILENCE
-                
-        return VADResult(
-            is_speech=(self._state == VoiceState.SPEECH),
-            confidence=confidence,
-            state=self._state
-        )
+    def _advance(self, confidences: Sequence[float]) -> List[bool]:
+        """
+        複数フレームの音声確率で状態を順に進める
+        
+        カウンタと状態はローカル変数で更新し、最後に1回だけ書き戻す。
         
-    def is_speech(self, audio_chunk: bytes) -> bool:
+        Args:
+            confidences: フレームごとの音声確率
+            
+        Returns:
+            フレームごとの音声区間判定
+        """
+        threshold = self.threshold
+        min_speech_frames = self._min_speech_frames
+        min_silence_frames = self._min_silence_frames
+        speech_frames = self._speech_frames
+        silence_frames = self._silence_frames
+        in_speech = self._state == VoiceState.SPEECH
+        
+        flags = []
+        for confidence in confidences:
+            # 連続フレーム数の更新は分岐なしの算術で行う
+            s = int(confidence >= threshold)
+            speech_frames = (speech_frames + 1) * s
+            silence_frames = (silence_frames + 1) * (1 - s)
+            
+            # 状態更新
+            if in_speech:
+                in_speech = silence_frames < min_silence_frames
+            else:
+                in_speech = speech_frames >= min_speech_frames
+            flags.append(in_speech)
+            
+        self._speech_frames = speech_frames
+        self._silence_frames = silence_frames
+        self._state = VoiceState.SPEECH if in_speech else VoiceState.SILENCE
+        return flags
+        
+    def is_speech(self, audio_chunk: Union[bytes, memoryview, np.ndarray]) -> bool:
         """
         簡易インターフェース: 音声区間かどうかを判定
         
         Args:
-            audio_chunk: 16kHz/mono/16bit PCM のバイト列
+            audio_chunk: 16kHz/mono/16bit PCM のバイト列、または int16 配列（配列はコピーせずに参照）
+            
+        Returns:
+            True if 音声区間
+        """
+        return self.is_speech_float32(self._bytes_to_float(audio_chunk))
+        
+    def is_speech_float32(self, samples: np.ndarray) -> bool:
+        """
+        簡易インターフェース: 正規化済み float32 サンプルが音声区間かどうかを判定
+        
+        Args:
+            samples: -1.0 から 1.0 の範囲の float32 配列
             
         Returns:
             True if 音声区間
         """
-        results = self.process(audio_chunk)
-        if not results:
-            return self._state == VoiceState.SPEECH
-        return results[-1].is_speech
+        # フレームごとの VADResult は作らず、最終状態だけを返す
+        self._advance(self._infer(samples))
+        return self._state == VoiceState.SPEECH
         
     @property
     def current_state(self) -> VoiceState:
@@ -223,6 +509,12 @@ class SimpleEnergyVAD:
         self.min_silence_duration_ms = min_silence_duration_ms
         self.sample_rate = sample_rate
         
+        # 閾値の dB を二乗平均の線形値に換算しておく（判定だけなら log10 が不要）
+        self._threshold_mean_square = 10 ** (threshold_db / 10)
+        # 持続時間の閾値はサンプル数に換算しておく（samples / sample_rate * 1000 >= 閾値 と同値）
+        self._min_speech_samples = math.ceil(min_speech_duration_ms * sample_rate / 1000)
+        self._min_silence_samples = math.ceil(min_silence_duration_ms * sample_rate / 1000)
+        
         self._state = VoiceState.SILENCE
         self._speech_samples = 0
         self._silence_samples = 0
@@ -233,47 +525,33 @@ class SimpleEnergyVAD:
         self._speech_samples = 0
         self._silence_samples = 0
         
-    def process(self, audio_chunk: bytes) -> VADResult:
+    def process(self, audio_chunk: Union[bytes, memoryview, np.ndarray]) -> VADResult:
         """
         音声チャンクを処理
         
         Args:
-            audio_chunk: 16kHz/mono/16bit PCM のバイト列
+            audio_chunk: 16kHz/mono/16bit PCM のバイト列、または int16 配列（配列はコピーせずに参照）
             
         Returns:
             VAD 結果
         """
-        samples = np.frombuffer(audio_chunk, dtype=np.int16).astype(np.float32)
-        
-        # RMS 計算
-        rms = np.sqrt(np.mean(samples ** 2)) / 32768.0
-        db = 20 * np.log10(max(rms, 1e-10))
+        samples = _as_int16(audio_chunk)
+        return self.process_float32(np.multiply(samples, _INV_INT16))
         
-        # 閾値判定
-        is_speech_frame = db >= self.threshold_db
-        
-        chunk_samples = len(samples)
+    def process_float32(self, samples: np.ndarray) -> VADResult:
+        """
+        正規化済みの float32 サンプルを処理
         
-        if is_speech_frame:
-            self._speech_samples += chunk_samples
-            self._silence_samples = 0
-        else:
-            self._silence_samples += chunk_samples
-            self._speech_samples = 0
+        Args:
+            samples: -1.0 から 1.0 の範囲の float32 配列
             
-        # 持続時間計算
-        speech_duration_ms = (self._speech_samples / self.sample_rate) * 1000
-        silence_duration_ms = (self._silence_samples / self.sample_rate) * 1000
+        Returns:
+            VAD 結果
+        """
+        mean_square = self._advance(samples)
         
-        # 状態更新
-        if self._state == VoiceState.SILENCE:
-            if speech_duration_ms >= self.min_speech_duration_ms:
-                self._state = VoiceState.SPEECH
-        else:
-            if silence_duration_ms >= self.min_silence_duration_ms:
-                self._state = VoiceState.SILENCE
-                
-        # 信頼度は正規化された RMS を使用
+        # 信頼度は正規化された RMS を使用。20*log10(rms) == 10*log10(二乗平均)
+        db = 10 * math.log10(mean_square)
         confidence = min(1.0, max(0.0, (db + 60) / 60))
         
         return VADResult(
@@ -282,11 +560,71 @@ class SimpleEnergyVAD:
             state=self._state
         )
         
-    def is_speech(self, audio_chunk: bytes) -> bool:
+    def _advance(self, samples: np.ndarray) -> float:
+        """
+        チャンクのエネルギーで状態を進める
+        
+        Args:
+            samples: -1.0 から 1.0 の範囲の float32 配列
+            
+        Returns:
+            二乗平均（下限 1e-20）
+        """
+        chunk_samples = len(samples)
+        
+        # 二乗平均を内積1回で求める（中間配列を作らない）
+        mean_square = float(np.dot(samples, samples)) / chunk_samples if chunk_samples else 0.0
+        mean_square = max(mean_square, 1e-20)
+        
+        # 閾値判定（dB ではなく二乗平均のまま比較する）
+        is_speech_frame = mean_square >= self._threshold_mean_square
+        
+        # 連続サンプル数の更新は分岐なしの算術で行う
+        s = int(is_speech_frame)
+        self._speech_samples = (self._speech_samples + chunk_samples) * s
+        self._silence_samples = (self._silence_samples + chunk_samples) * (1 - s)
+            
+        # 状態更新（持続時間ではなくサンプル数のまま比較する）
+        if self._state == VoiceState.SILENCE:
+            if self._speech_samples >= self._min_speech_samples:
+                self._state = VoiceState.SPEECH
+        else:
+            if self._silence_samples >= self._min_silence_samples:
+                self._state = VoiceState.SILENCE
+                
+        return mean_square
+        
+    def is_speech(self, audio_chunk: Union[bytes, memoryview, np.ndarray]) -> bool:
         """簡易インターフェース"""
-        return self.process(audio_chunk).is_speech
+        samples = _as_int16(audio_chunk)
+        return self.is_speech_float32(np.multiply(samples, _INV_INT16))
+        
+    def is_speech_float32(self, samples: np.ndarray) -> bool:
+        """簡易インターフェース（正規化済み float32 入力）。判定だけなので log10 と VADResult を省く"""
+        self._advance(samples)
+        return self._state == VoiceState.SPEECH
         
     @property
     def current_state(self) -> VoiceState:
         """現在の状態"""
         return self._state
+
+
+def quantize_onnx_model(input_path: str, output_path: str) -> str:
+    """
+    Silero VAD の ONNX モデルを int8 に動的量子化する
+    
+    VAD は全チャンクで実行されるため、重みを int8 にして推論コストを下げる。
+    生成したモデルは SileroVAD(model_path=...) で使用する。
+    
+    Args:
+        input_path: 元の ONNX モデル（silero-vad パッケージ同梱の silero_vad.onnx など）
+        output_path: 量子化モデルの出力先
+        
+    Returns:
+        出力先のパス
+    """
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+    
+    quantize_dynamic(input_path, output_path, weight_type=QuantType.QInt8)
+    return output_path
@@ -3,12 +3,17 @@
 """
 
 import pytest
+import threading
 import numpy as np
 from unittest.mock import MagicMock, patch
 
 # テスト対象のモジュール
 from src.audio.wasapi_capture import WasapiCapture, AudioDevice
-from src.audio.resampler import AudioResampler, PassthroughResampler, create_resampler
+from src.audio.resampler import (
+    AudioResampler, Int16StereoResampler, PassthroughResampler, PolyphaseStream,
+    create_resampler
+)
+from src.audio.ring_buffer import SpscRingBuffer
 
 
 class TestWasapiCapture:
@@ -38,6 +43,135 @@ class TestWasapiCapture:
         assert capture.sample_rate == 16000
         assert capture.channels == 1
         assert capture.is_recording is False
+        
+    def test_clear_queue(self):
+        """未読チャンクを一括で破棄するテスト"""
+        capture = WasapiCapture()
+        capture._is_recording = True
+        data = np.zeros(1024, dtype=np.int16).tobytes()
+        for _ in range(3):
+            capture._audio_callback(data, 1024, None, 0)
+            
+        capture.clear_queue()
+        
+        assert len(capture._audio_queue) == 0
+        assert capture.read(timeout=0) is None
+        
+    def test_callback_runs_on_worker_thread(self):
+        """コールバックはオーディオスレッドではなくワーカースレッドで呼ばれる"""
+        capture = WasapiCapture()
+        capture._pa = MagicMock()
+        capture._pa.get_default_input_device_info.return_value = {"index": 0}
+        
+        received = []
+        threads = []
+        def on_chunk(chunk):
+            received.append(chunk.copy())  # ビューは戻った後に再利用される
+            threads.append(threading.current_thread())
+            
+        capture.start(callback=on_chunk)
+        data = np.arange(1024, dtype=np.int16).tobytes()
+        capture._audio_callback(data, 1024, None, 0)
+        capture._audio_callback(data, 1024, None, 0)
+        capture.stop()
+        
+        # stop() は残りのチャンクを配信し終えてから戻る
+        assert len(received) == 2
+        assert np.array_equal(received[0], np.arange(1024, dtype=np.int16))
+        assert threads[0] is not threading.current_thread()
+        assert capture._worker is None
+        
+    def test_overruns_are_reported(self, caplog):
+        """リングバッファ溢れを間隔を空けて警告し、停止時に残りを報告するテスト"""
+        capture = WasapiCapture()
+        capture._is_recording = True
+        data = np.zeros(1024, dtype=np.int16).tobytes()
+        for _ in range(capture.QUEUE_SLOTS + 2):
+            capture._audio_callback(data, 1024, None, 0)
+            
+        with caplog.at_level("WARNING", logger="src.audio.wasapi_capture"):
+            capture._report_overruns()
+            capture._audio_callback(data, 1024, None, 0)
+            capture._report_overruns()  # 間隔内なので警告しない
+            assert len(caplog.records) == 1
+            assert "2 チャンク" in caplog.records[0].getMessage()
+            
+            capture.stop()
+            assert len(caplog.records) == 2
+            assert "1 チャンク" in caplog.records[1].getMessage()
+
+
+class TestSpscRingBuffer:
+    """SpscRingBuffer クラスのテスト"""
+    
+    def test_push_pop_order(self):
+        """書き込み順に読み出せるテスト"""
+        ring = SpscRingBuffer(slots=4, slot_size=8)
+        
+        ring.push(np.array([1, 2, 3], dtype=np.int16))
+        ring.push(np.array([4, 5], dtype=np.int16))
+        
+        assert len(ring) == 2
+        np.testing.assert_array_equal(ring.pop(timeout=0), [1, 2, 3])
+        np.testing.assert_array_equal(ring.pop(timeout=0), [4, 5])
+        assert ring.pop(timeout=0) is None
+        
+    def test_pop_timeout(self):
+        """空の場合はタイムアウトで None を返すテスト"""
+        ring = SpscRingBuffer(slots=4, slot_size=8)
+        
+        assert ring.pop(timeout=0.01) is None
+        
+    def test_overrun(self):
+        """満杯の場合は新しいチャンクを破棄するテスト"""
+        ring = SpscRingBuffer(slots=2, slot_size=4)
+        
+        assert ring.push(np.zeros(4, dtype=np.int16)) is True
+        assert ring.push(np.zeros(4, dtype=np.int16)) is True
+        assert ring.push(np.zeros(4, dtype=np.int16)) is False
+        assert ring.overruns == 1
+        
+    def test_clear(self):
+        """クリアテスト"""
+        ring = SpscRingBuffer(slots=4, slot_size=4)
+        ring.push(np.zeros(4, dtype=np.int16))
+        ring.push(np.zeros(4, dtype=np.int16))
+        
+        ring.clear()
+        
+        assert len(ring) == 0
+        assert ring.pop(timeout=0) is None
+        
+    def test_peek_release(self):
+        """peek はコピーせずに参照し、release まで消費しないテスト"""
+        ring = SpscRingBuffer(slots=2, slot_size=4)
+        ring.push(np.array([1, 2], dtype=np.int16))
+        
+        view = ring.peek(timeout=0)
+        assert view.base is not None
+        assert list(view) == [1, 2]
+        assert len(ring) == 1
+        
+        ring.release()
+        assert len(ring) == 0
+        assert ring.peek(timeout=0) is None
+        
+        # 空の状態での release は何もしない
+        ring.release()
+        assert len(ring) == 0
+        
+    def test_pop_wakes_on_push(self):
+        """別スレッドからの書き込みで待機中の読み出しが起きるテスト"""
+        ring = SpscRingBuffer(slots=4, slot_size=4)
+        producer = threading.Timer(
+            0.02, ring.push, args=(np.array([7, 8], dtype=np.int16),)
+        )
+        producer.start()
+        
+        chunk = ring.pop(timeout=2.0)
+        producer.join()
+        
+        np.testing.assert_array_equal(chunk, [7, 8])
 
 
 class TestAudioResampler:
@@ -94,6 +228,40 @@ class TestAudioResampler:
         expected = np.array([150, 350, 550], dtype=np.int16)
         np.testing.assert_array_equal(expected, output_samples)
         
+    def test_stereo_to_mono_no_overflow(self):
+        """int16 の端の値でもオーバーフローしないテスト"""
+        resampler = AudioResampler(
+            input_sample_rate=16000,
+            input_channels=2,
+            input_dtype=np.int16
+        )
+        
+        stereo_samples = np.array([
+            32767, 32767,
+            -32768, -32768,
+            32767, -32768,
+        ], dtype=np.int16)
+        
+        output_data = resampler.resample(stereo_samples.tobytes())
+        output_samples = np.frombuffer(output_data, dtype=np.int16)
+        
+        expected = np.array([32767, -32768, -1], dtype=np.int16)
+        np.testing.assert_array_equal(expected, output_samples)
+        
+    def test_stereo_to_mono_float32(self):
+        """float32 ステレオは float32 のままモノラル化されるテスト"""
+        resampler = AudioResampler(
+            input_sample_rate=16000,
+            input_channels=2,
+            input_dtype=np.float32
+        )
+        
+        stereo_samples = np.array([0.5, 0.25, -1.0, 0.0], dtype=np.float32)
+        mono = resampler._to_mono(stereo_samples)
+        
+        assert mono.dtype == np.float32
+        np.testing.assert_array_equal(mono, [0.375, -0.5])
+        
     def test_resample_44100_to_16000(self):
         """44100Hz から 16000Hz へのリサンプリングテスト"""
         resampler = AudioResampler(
@@ -108,11 +276,105 @@ class TestAudioResampler:
         samples = (np.sin(2 * np.pi * frequency * t) * 16000).astype(np.int16)
         
         input_data = samples.tobytes()
-        output_data = resampler.resample(input_data)
+        output_data = resampler.resample(input_data) + resampler.flush()
         output_samples = np.frombuffer(output_data, dtype=np.int16)
         
         # 16000 サンプル（1秒分）になっているはず
         assert len(output_samples) == 16000
+        
+    def test_resample_stream_chunks(self):
+        """チャンク分割しても一括処理と同じサンプル数になるテスト"""
+        resampler = AudioResampler(
+            input_sample_rate=48000,
+            input_channels=1,
+            input_dtype=np.int16
+        )
+        
+        t = np.linspace(0, 1, 48000, endpoint=False)
+        samples = (np.sin(2 * np.pi * 440 * t) * 16000).astype(np.int16)
+        
+        output_data = b""
+        for i in range(0, len(samples), 1024):
+            output_data += resampler.resample(samples[i:i + 1024].tobytes())
+        output_data += resampler.flush()
+        
+        assert len(output_data) // 2 == 16000
+        
+    def test_resample_ndarray(self):
+        """numpy 配列のまま変換するテスト"""
+        resampler = AudioResampler(
+            input_sample_rate=16000,
+            input_channels=2,
+            input_dtype=np.int16
+        )
+        
+        stereo_samples = np.array([100, 200, 300, 400], dtype=np.int16)
+        output_samples = resampler.resample_ndarray(stereo_samples)
+        
+        assert output_samples.dtype == np.int16
+        np.testing.assert_array_equal(np.array([150, 350], dtype=np.int16), output_samples)
+
+
+class TestInt16StereoResampler:
+    """Int16StereoResampler クラスのテスト"""
+    
+    def test_matches_generic_resampler(self):
+        """汎用の AudioResampler と同じ出力になるテスト"""
+        rng = np.random.default_rng(0)
+        stereo = rng.integers(-20000, 20000, size=48000 * 2, dtype=np.int16)
+        
+        generic = AudioResampler(input_sample_rate=48000, input_channels=2)
+        special = Int16StereoResampler(input_sample_rate=48000)
+        
+        expected = generic.resample(stereo.tobytes()) + generic.flush()
+        actual = special.resample(stereo.tobytes()) + special.flush()
+        
+        assert actual == expected
+        assert len(actual) == 16000 * 2
+        
+    def test_unsupported_rate(self):
+        """未対応のサンプルレートは ValueError"""
+        with pytest.raises(ValueError):
+            Int16StereoResampler(input_sample_rate=22050)
+
+
+class TestPolyphaseStream:
+    """PolyphaseStream クラスのテスト（soxr 非依存のフォールバック）"""
+    
+    def test_ratio(self):
+        """L/M が既約分数になっているテスト"""
+        stream = PolyphaseStream(44100, 16000)
+        assert stream.up == 160
+        assert stream.down == 441
+        
+    def test_chunked_matches_whole(self):
+        """チャンク分割しても一括処理と同じ出力になるテスト"""
+        t = np.arange(48000) / 48000
+        samples = (np.sin(2 * np.pi * 440 * t) * 0.5).astype(np.float32)
+        
+        stream = PolyphaseStream(48000, 16000)
+        whole = np.concatenate([
+            stream.resample_chunk(samples),
+            stream.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+        ])
+        
+        chunks = [stream.resample_chunk(samples[i:i + 1024]) for i in range(0, len(samples), 1024)]
+        chunks.append(stream.resample_chunk(np.zeros(0, dtype=np.float32), last=True))
+        
+        assert len(whole) == 16000
+        np.testing.assert_array_almost_equal(whole, np.concatenate(chunks), decimal=5)
+        
+    def test_buffer_reused_in_steady_state(self):
+        """同じ長さのチャンクが続く場合は入力バッファを再確保しないテスト"""
+        stream = PolyphaseStream(48000, 16000, dtype=np.int16)
+        chunk = np.ones(1024, dtype=np.int16)
+        stream.resample_chunk(chunk)
+        buffer = stream._buffer
+        
+        for _ in range(20):
+            stream.resample_chunk(chunk)
+            
+        assert stream._buffer is buffer
 
 
 class TestPassthroughResampler:
@@ -126,6 +388,7 @@ class TestPassthroughResampler:
         output_data = resampler.resample(input_data)
         
         assert input_data == output_data
+        assert resampler.flush() == b""
 
 
 class TestCreateResampler:
@@ -157,6 +420,15 @@ class TestCreateResampler:
             input_dtype=np.int16
         )
         assert isinstance(resampler, AudioResampler)
+        
+    def test_create_int16_stereo_resampler(self):
+        """48kHz ステレオ int16 時は Int16StereoResampler を返す"""
+        resampler = create_resampler(
+            input_sample_rate=48000,
+            input_channels=2,
+            input_dtype=np.int16
+        )
+        assert isinstance(resampler, Int16StereoResampler)
 
 
 if __name__ == "__main__":
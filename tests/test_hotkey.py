@@ -3,10 +3,13 @@
 """
 
 import pytest
-from unittest.mock import MagicMock, call
+from unittest.mock import MagicMock, call, patch
+
+from pynput import keyboard
 
 from src.hotkey.global_hotkey import (
     GlobalHotkeyManager,
+    PynputHotkeyManager,
     RecordingToggle,
     HotkeyConfig,
     VK,
@@ -14,6 +17,12 @@ from src.hotkey.global_hotkey import (
     DEFAULT_HOTKEY
 )
 
+# ダミーバックエンドでは全キーが同じ値になるため、キーを区別するテストはスキップする
+requires_distinct_keys = pytest.mark.skipif(
+    keyboard.Key.f8 == keyboard.Key.f9,
+    reason="pynput バックエンドがキーを区別しない"
+)
+
 
 class TestVK:
     """VK 定数のテスト"""
@@ -127,6 +136,16 @@ class TestRecordingToggle:
         toggle.toggle()  # stop
         on_stop.assert_called_once()
         
+    def test_debounce(self):
+        """デバウンス時間内の連続トグルは無視されるテスト"""
+        toggle = RecordingToggle(debounce_ms=500)
+        
+        assert toggle.toggle() is True
+        assert toggle.toggle() is True  # 500ms 以内なので無視
+        
+        toggle._last_toggle_time -= 500 * 1_000_000
+        assert toggle.toggle() is False
+        
     def test_start_method(self):
         """start メソッドテスト"""
         on_start = MagicMock()
@@ -200,6 +219,119 @@ class TestGlobalHotkeyManager:
         
         assert result is True
         assert 1 not in manager._hotkeys
+        
+    def test_sync_registrations(self):
+        """登録内容が RegisterHotKey/UnregisterHotKey に反映されるテスト"""
+        manager = GlobalHotkeyManager()
+        manager._user32 = MagicMock()
+        manager._user32.RegisterHotKey.return_value = 1
+        config = HotkeyConfig(key=VK.F8, modifiers=MOD.CONTROL)
+        manager.register(1, config, MagicMock())
+        registered = {}
+        
+        manager._sync_registrations(registered)
+        manager._user32.RegisterHotKey.assert_called_once_with(
+            None, 1, MOD.CONTROL | MOD.NOREPEAT, VK.F8
+        )
+        assert registered == {1: config}
+        
+        manager.unregister(1)
+        manager._sync_registrations(registered)
+        manager._user32.UnregisterHotKey.assert_called_once_with(None, 1)
+        assert registered == {}
+        
+    def test_sync_registrations_failure(self):
+        """RegisterHotKey が失敗すると False を返すテスト"""
+        manager = GlobalHotkeyManager()
+        manager._user32 = MagicMock()
+        manager._user32.RegisterHotKey.return_value = 0
+        manager.register(1, HotkeyConfig(key=VK.F8, modifiers=0), MagicMock())
+        registered = {}
+        
+        with patch("ctypes.get_last_error", return_value=1409, create=True):
+            assert manager._sync_registrations(registered) is False
+        assert registered == {}
+        
+    def test_start_returns_false_when_registration_fails(self):
+        """登録に失敗すると start() がスレッドを止めて False を返すテスト"""
+        manager = GlobalHotkeyManager()
+        manager.register(1, HotkeyConfig(key=VK.F8, modifiers=0), MagicMock())
+        user32 = MagicMock()
+        user32.RegisterHotKey.return_value = 0
+        kernel32 = MagicMock()
+        kernel32.GetCurrentThreadId.return_value = 1234
+        
+        with patch("ctypes.WinDLL", side_effect=[user32, kernel32], create=True), \
+                patch("ctypes.get_last_error", return_value=1409, create=True):
+            assert manager.start(timeout=1.0) is False
+            
+        assert manager.is_running is False
+        user32.GetMessageW.assert_not_called()
+        
+    def test_dispatch(self):
+        """WM_HOTKEY の ID に対応するコールバックが呼ばれるテスト"""
+        manager = GlobalHotkeyManager()
+        callback = MagicMock()
+        manager.register(1, HotkeyConfig(key=VK.F8, modifiers=0), callback)
+        
+        manager._dispatch(1)
+        manager._dispatch(2)  # 未登録の ID は無視
+        
+        callback.assert_called_once()
+
+
+class TestPynputHotkeyManager:
+    """PynputHotkeyManager クラスのテスト"""
+    
+    def test_unregister_removes_key_index(self):
+        """解除するとキー検索用の索引からも削除されるテスト"""
+        manager = PynputHotkeyManager()
+        manager.register(1, HotkeyConfig(key=VK.F8, modifiers=0), MagicMock())
+        
+        assert manager.unregister(1) is True
+        assert manager._by_key == {}
+        
+    @requires_distinct_keys
+    def test_on_press_dispatches_by_key(self):
+        """押されたキーに登録されたホットキーだけが呼ばれるテスト"""
+        manager = PynputHotkeyManager()
+        on_f8 = MagicMock()
+        on_f9 = MagicMock()
+        manager.register(1, HotkeyConfig(key=VK.F8, modifiers=0), on_f8)
+        manager.register(2, HotkeyConfig(key=VK.F9, modifiers=0), on_f9)
+        
+        manager._on_press(keyboard.Key.f8)
+        manager._on_press(keyboard.Key.space)
+        
+        on_f8.assert_called_once()
+        on_f9.assert_not_called()
+        
+    @requires_distinct_keys
+    def test_on_press_with_modifiers(self):
+        """同じキーでもモディファイアの組み合わせで区別されるテスト"""
+        manager = PynputHotkeyManager()
+        plain = MagicMock()
+        with_ctrl = MagicMock()
+        manager.register(1, HotkeyConfig(key=VK.F9, modifiers=MOD.SHIFT), plain)
+        manager.register(2, HotkeyConfig(key=VK.F9, modifiers=MOD.CONTROL), with_ctrl)
+        
+        manager._on_press(keyboard.Key.ctrl_l)
+        manager._on_press(keyboard.Key.f9)
+        
+        with_ctrl.assert_called_once()
+        plain.assert_not_called()
+        
+    @requires_distinct_keys
+    def test_modifier_mask_tracking(self):
+        """押下中のモディファイアがビットマスクで追跡されるテスト"""
+        manager = PynputHotkeyManager()
+        
+        manager._on_press(keyboard.Key.ctrl_l)
+        manager._on_press(keyboard.Key.shift_r)
+        assert manager._mod_mask == MOD.CONTROL | MOD.SHIFT
+        
+        manager._on_release(keyboard.Key.ctrl_l)
+        assert manager._mod_mask == MOD.SHIFT
 
 
 if __name__ == "__main__":
@@ -7,7 +7,7 @@ from unittest.mock import MagicMock, patch
 import ctypes
 
 from src.input.send_input import (
-    TextInjector, InjectionResult, UIPIChecker, inject_text,
+    TextInjector, InjectionMode, InjectionResult, UIPIChecker, inject_text,
     INPUT, KEYBDINPUT, KEYEVENTF_UNICODE
 )
 
@@ -48,6 +48,7 @@ class TestTextInjector:
         injector = TextInjector()
         assert injector.delay_between_chars_ms == 0.0
         assert injector.batch_size == 50
+        assert injector.batch_chars == 8
         
     def test_init_custom_params(self):
         """カスタムパラメータでの初期化テスト"""
@@ -77,6 +78,14 @@ class TestTextInjector:
         
         assert inp.union.ki.dwFlags == (KEYEVENTF_UNICODE | 0x0002)  # KEYEVENTF_KEYUP
         
+    def test_template(self):
+        """キーダウン/キーアップのテンプレートテスト"""
+        injector = TextInjector()
+        
+        assert injector._template[0].type == 1  # INPUT_KEYBOARD
+        assert injector._template[0].union.ki.dwFlags == KEYEVENTF_UNICODE
+        assert injector._template[1].union.ki.dwFlags == (KEYEVENTF_UNICODE | 0x0002)
+        
     def test_inject_empty_string(self):
         """空文字列注入テスト"""
         injector = TextInjector()
@@ -108,6 +117,138 @@ class TestTextInjector:
         assert result.success is False
         assert "X" in result.failed_characters
 
+        
+    def test_inject_single_send_input_call(self):
+        """全文字を1回の SendInput で送信するテスト"""
+        injector = TextInjector()
+        injector._send_input = MagicMock(return_value=6)
+        
+        result = injector.inject("abc")
+        
+        assert result.success is True
+        assert result.characters_sent == 3
+        assert result.failed_characters == ()
+        injector._send_input.assert_called_once()
+        assert injector._send_input.call_args[0][0] == 6  # 3文字 × (down + up)
+        
+    def test_inject_resends_after_short_write(self):
+        """送信数が不足した場合は残りを再送するテスト"""
+        injector = TextInjector(batch_size=1)
+        injector._send_input = MagicMock(side_effect=[2, 2, 2])
+        
+        result = injector.inject("abc")
+        
+        assert result.success is True
+        assert result.characters_sent == 3
+        counts = [c[0][0] for c in injector._send_input.call_args_list]
+        assert counts == [6, 2, 2]
+        
+    def test_inject_resends_pending_keyup(self):
+        """キーダウンだけ送信された文字はキーアップを単独で再送し、失敗扱いにしないテスト"""
+        injector = TextInjector(batch_size=1)
+        injector._send_input = MagicMock(side_effect=[3, 0, 1, 2])
+        
+        result = injector.inject("abc")
+        
+        assert result.success is True
+        assert result.characters_sent == 3
+        assert result.failed_characters == ()
+        counts = [c[0][0] for c in injector._send_input.call_args_list]
+        assert counts == [6, 2, 1, 2]  # b のキーアップだけを送ってから c を送る
+
+        
+    def test_inject_surrogate_pair(self):
+        """BMP 外の文字はサロゲートペア（4イベント）で送信するテスト"""
+        injector = TextInjector()
+        injector._send_input = MagicMock(return_value=8)
+        
+        result = injector.inject("a😀b")
+        
+        assert result.success is True
+        assert result.characters_sent == 3
+        assert injector._send_input.call_args[0][0] == 8  # a, 上位/下位サロゲート, b
+        
+    def test_inputs_reused(self):
+        """INPUT 配列を使い回し、不足時だけ拡張するテスト"""
+        injector = TextInjector()
+        injector._send_input = MagicMock(side_effect=lambda count, inputs, size: count)
+        
+        injector.inject("abcd")
+        inputs = injector._inputs
+        injector.inject("xy")
+        
+        assert injector._inputs is inputs
+        assert injector._inputs[0].union.ki.wScan == ord("x")
+        assert injector._inputs[3].union.ki.dwFlags == (KEYEVENTF_UNICODE | 0x0002)
+        
+        injector.inject("abcdefgh")
+        
+        assert injector._inputs_capacity == 16
+        assert injector._inputs[15].union.ki.wScan == ord("h")
+        
+    def test_wm_char_mode_posts_to_edit_control(self):
+        """WM_CHAR モードで対応コントロールには PostMessage で送るテスト"""
+        injector = TextInjector(mode=InjectionMode.WM_CHAR)
+        injector._find_focus_window = MagicMock(return_value=0x1234)
+        injector._window_class = MagicMock(return_value="Edit")
+        injector._post_message = MagicMock(return_value=1)
+        injector._send_input = MagicMock()
+        
+        result = injector.inject("a😀")
+        
+        assert result.success is True
+        assert result.characters_sent == 2
+        injector._send_input.assert_not_called()
+        units = [c[0][2] for c in injector._post_message.call_args_list]
+        assert units == [ord("a"), 0xD83D, 0xDE00]
+        
+    def test_wm_char_mode_falls_back_to_send_input(self):
+        """WM_CHAR 非対応のウィンドウでは SendInput を使うテスト"""
+        injector = TextInjector(mode=InjectionMode.WM_CHAR)
+        injector._find_focus_window = MagicMock(return_value=0x1234)
+        injector._window_class = MagicMock(return_value="Chrome_RenderWidgetHostHWND")
+        injector._post_message = MagicMock(return_value=1)
+        injector._send_input = MagicMock(return_value=2)
+        
+        result = injector.inject("a")
+        
+        assert result.success is True
+        injector._post_message.assert_not_called()
+        injector._send_input.assert_called_once()
+        
+    def test_wait_for_ime_ready(self):
+        """準備完了になった時点で待機を終えるテスト"""
+        injector = TextInjector()
+        injector._is_ime_ready = MagicMock(side_effect=[False, True])
+        
+        assert injector.wait_for_ime_ready(timeout_ms=100.0, poll_interval_ms=0.0) is True
+        assert injector._is_ime_ready.call_count == 2
+        
+    def test_wait_for_ime_ready_timeout(self):
+        """準備完了にならない場合はタイムアウトするテスト"""
+        injector = TextInjector()
+        injector._is_ime_ready = MagicMock(return_value=False)
+        
+        assert injector.wait_for_ime_ready(timeout_ms=5.0, poll_interval_ms=1.0) is False
+        
+    def test_char_unit_starts(self):
+        """文字ごとの UTF-16 先頭位置テスト"""
+        starts = TextInjector._char_unit_starts("a😀b", 4)
+        
+        assert list(starts) == [0, 1, 3]
+
+        
+    def test_inject_grouped_with_delay(self):
+        """遅延ありの場合は batch_chars 文字ずつ送信するテスト"""
+        injector = TextInjector(delay_between_chars_ms=1.0, batch_chars=2)
+        injector._send_input = MagicMock(side_effect=lambda count, inputs, size: count)
+        
+        result = injector.inject("abcde")
+        
+        assert result.characters_sent == 5
+        counts = [c[0][0] for c in injector._send_input.call_args_list]
+        assert counts == [4, 4, 2]
+
 
 class TestUIPIChecker:
     """UIPIChecker クラスのテスト"""
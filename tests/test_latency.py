@@ -5,6 +5,7 @@
 import pytest
 import time
 import json
+import statistics
 
 from src.metrics.latency import (
     LatencyTimer,
@@ -53,6 +54,12 @@ class TestLatencyMeasurement:
         assert result["total_latency_ms"] == 100.5
         assert result["stt_duration_ms"] == 80.3
         assert "timestamp" in result
+        
+    def test_slots(self):
+        """インスタンス辞書を持たないテスト"""
+        measurement = LatencyMeasurement()
+        
+        assert not hasattr(measurement, "__dict__")
 
 
 class TestLatencyStatistics:
@@ -97,6 +104,7 @@ class TestLatencyTimer:
         timer.mark(MeasurementPoint.SPEECH_END)
         
         assert MeasurementPoint.SPEECH_END in timer._timestamps
+        assert isinstance(timer._timestamps[MeasurementPoint.SPEECH_END], int)
         
     def test_reset(self):
         """リセットテスト"""
@@ -186,6 +194,7 @@ class TestLatencyLogger:
         recent = logger.get_recent(5)
         
         assert len(recent) == 5
+        assert recent[0].total_latency_ms == 150.0
         assert recent[-1].total_latency_ms == 190.0
         
     def test_clear(self):
@@ -231,6 +240,26 @@ class TestLatencyLogger:
             logger.log(LatencyMeasurement(total_latency_ms=i))
             
         assert len(logger._measurements) == 10
+        
+    def test_statistics_match_reference(self):
+        """履歴が巡回した後も統計値が全件計算と一致するテスト"""
+        logger = LatencyLogger(max_history=150)
+        values = [float((i * 37) % 211) for i in range(400)]
+        for latency in values:
+            logger.log(LatencyMeasurement(total_latency_ms=latency))
+            
+        window = values[-150:]
+        ordered = sorted(window)
+        stats = logger.get_statistics()
+        
+        assert stats.count == 150
+        assert stats.mean_ms == pytest.approx(statistics.mean(window))
+        assert stats.stddev_ms == pytest.approx(statistics.stdev(window))
+        assert stats.median_ms == statistics.median(window)
+        assert stats.min_ms == min(window)
+        assert stats.max_ms == max(window)
+        assert stats.p95_ms == ordered[int(150 * 0.95)]
+        assert stats.p99_ms == ordered[int(150 * 0.99)]
 
 
 class TestGetLatencyLogger:
@@ -2,6 +2,10 @@
 STT モジュールのテスト
 """
 
+import os
+import sys
+from unittest.mock import MagicMock, patch
+
 import pytest
 import numpy as np
 
@@ -14,6 +18,7 @@ from src.stt.whisper_stream import (
 )
 
 
+@pytest.mark.noload
 class TestTranscriptionResult:
     """TranscriptionResult データクラスのテスト"""
     
@@ -30,6 +35,7 @@ class TestTranscriptionResult:
         assert result.language == "ja"
 
 
+@pytest.mark.noload
 class TestTranscriptionSegment:
     """TranscriptionSegment データクラスのテスト"""
     
@@ -47,6 +53,7 @@ class TestTranscriptionSegment:
         assert segment.end == 1.0
 
 
+@pytest.mark.noload
 class TestWhisperStreamProcessor:
     """WhisperStreamProcessor クラスのテスト（モデルロードなし）"""
     
@@ -65,11 +72,120 @@ class TestWhisperStreamProcessor:
         processor = WhisperStreamProcessor(
             model_size="small",
             language="en",
-            beam_size=3
+            beam_size=3,
+            cpu_threads=4
         )
         assert processor.model_size == "small"
         assert processor.language == "en"
         assert processor.beam_size == 3
+        assert processor.cpu_threads == 4
+        
+    def test_auto_compute_type(self):
+        """compute_type="auto" の解決テスト"""
+        assert WhisperStreamProcessor(compute_type="auto").compute_type == "int8"
+        assert WhisperStreamProcessor(model_size="large-v3", compute_type="auto").compute_type == "int8"
+        assert WhisperStreamProcessor(model_size="base", device="cuda", compute_type="auto").compute_type == "float16"
+        assert WhisperStreamProcessor(model_size="medium", device="cuda", compute_type="auto").compute_type == "int8_float16"
+        
+    def test_invalid_compute_type(self):
+        """未対応の compute_type は初期化時にエラーになるテスト"""
+        with pytest.raises(ValueError):
+            WhisperStreamProcessor(compute_type="int4")
+            
+    @staticmethod
+    def _fake_hub_modules(fake_whisper):
+        """faster_whisper と huggingface_hub.utils の差し替え用モジュール"""
+        hub_utils = MagicMock()
+        hub_utils.LocalEntryNotFoundError = type("LocalEntryNotFoundError", (FileNotFoundError,), {})
+        return {"faster_whisper": fake_whisper, "huggingface_hub.utils": hub_utils}, hub_utils
+        
+    def test_load_model_prefers_local_cache(self):
+        """キャッシュ済みモデルを優先し、なければダウンロードするテスト"""
+        fake_module = MagicMock()
+        modules, hub_utils = self._fake_hub_modules(fake_module)
+        fake_module.WhisperModel.side_effect = [hub_utils.LocalEntryNotFoundError(), "model"]
+        processor = WhisperStreamProcessor()
+        
+        with patch.dict(sys.modules, modules):
+            processor.preload()
+            
+        calls = fake_module.WhisperModel.call_args_list
+        assert calls[0].kwargs["local_files_only"] is True
+        assert all(call.kwargs["num_workers"] == 1 for call in calls)
+        assert "local_files_only" not in calls[1].kwargs
+        assert processor._model == "model"
+        
+    def test_load_model_error_is_not_cache_miss(self):
+        """キャッシュ未取得以外のエラーはダウンロードせずにそのまま送出するテスト"""
+        fake_module = MagicMock()
+        modules, _ = self._fake_hub_modules(fake_module)
+        fake_module.WhisperModel.side_effect = RuntimeError("CUDA driver version is insufficient")
+        processor = WhisperStreamProcessor()
+        
+        with patch.dict(sys.modules, modules), pytest.raises(RuntimeError):
+            processor.preload()
+            
+        assert fake_module.WhisperModel.call_count == 1
+        assert processor._model is None
+        
+    def test_transcribe_joins_japanese_without_spaces(self):
+        """日本語のセグメントは空白なしで連結するテスト"""
+        def make_segment(text):
+            return MagicMock(text=text, start=0.0, end=1.0, avg_logprob=-0.1)
+            
+        processor = WhisperStreamProcessor()
+        processor._model = MagicMock()
+        info = MagicMock(language="ja", language_probability=0.99)
+        processor._model.transcribe.return_value = ([make_segment(" こんにちは。"), make_segment(" 元気です。")], info)
+        
+        result = processor.transcribe(np.zeros(16000, dtype=np.int16))
+        
+        assert result.text == "こんにちは。元気です。"
+        assert [seg.text for seg in result.segments] == ["こんにちは。", "元気です。"]
+        
+        info.language = "en"
+        processor._model.transcribe.return_value = ([make_segment(" Hello."), make_segment(" Bye.")], info)
+        
+        assert processor.transcribe(np.zeros(16000, dtype=np.int16)).text == "Hello. Bye."
+        
+    def test_greedy_for_short_utterance(self):
+        """短い発話は greedy、長い発話は設定のビーム数で復号するテスト"""
+        processor = WhisperStreamProcessor(beam_size=3)
+        processor._model = MagicMock()
+        processor._model.transcribe.side_effect = lambda *args, **kwargs: (iter([]), MagicMock(language="ja"))
+        
+        processor.transcribe(np.zeros(16000, dtype=np.int16))
+        assert processor._model.transcribe.call_args.kwargs["beam_size"] == 1
+        assert processor._model.transcribe.call_args.kwargs["temperature"] == 0.0
+        assert processor._model.transcribe.call_args.kwargs["without_timestamps"] is True
+        
+        processor.transcribe(np.zeros(16000 * 3, dtype=np.int16))
+        assert processor._model.transcribe.call_args.kwargs["beam_size"] == 3
+        
+    def test_warmup_runs_once(self):
+        """ウォームアップは無音で1回だけ推論するテスト"""
+        processor = WhisperStreamProcessor()
+        processor._model = MagicMock()
+        processor._model.transcribe.return_value = (iter([]), MagicMock())
+        
+        processor.warmup(duration_s=1.0)
+        processor.warmup(duration_s=1.0)
+        
+        processor._model.transcribe.assert_called_once()
+        audio = processor._model.transcribe.call_args[0][0]
+        assert audio.dtype == np.float32
+        assert len(audio) == 16000
+        # 本番の transcribe() と同じ復号設定を使う
+        assert processor._model.transcribe.call_args.kwargs == processor._decode_options(16000)
+        assert processor._model.transcribe.call_args.kwargs["without_timestamps"] is True
+        
+    def test_cpu_threads_default_physical_cores(self):
+        """CPU 推論では既定で物理コア数（論理コアの半分）のスレッドを使うテスト"""
+        physical = max(1, (os.cpu_count() or 2) // 2)
+        assert WhisperStreamProcessor(model_size="base").cpu_threads == physical
+        assert WhisperStreamProcessor(model_size="medium").cpu_threads == physical
+        assert WhisperStreamProcessor(model_size="medium", cpu_threads=2).cpu_threads == 2
+        assert WhisperStreamProcessor(device="cuda", compute_type="float16").cpu_threads == 0
         
     def test_bytes_to_float32(self):
         """バイト列変換テスト"""
@@ -78,10 +194,42 @@ class TestWhisperStreamProcessor:
         samples = np.array([0, 16384, -16384, 32767, -32768], dtype=np.int16)
         result = processor._bytes_to_float32(samples.tobytes())
         
+        # 1/32768 は 2 のべき乗なので、int16 の全範囲で float32 として厳密に表せる
         expected = np.array([0.0, 0.5, -0.5, 32767/32768, -1.0], dtype=np.float32)
-        np.testing.assert_array_almost_equal(result, expected, decimal=4)
+        np.testing.assert_array_equal(result, expected)
+        
+    def test_bytes_to_float32_rejects_float_array(self):
+        """int16 以外の配列は正規化せずにエラーにするテスト"""
+        processor = WhisperStreamProcessor()
+        
+        with pytest.raises(TypeError):
+            processor._bytes_to_float32(np.zeros(512, dtype=np.float32))
+            
+    def test_bytes_to_float32_reuses_buffer(self):
+        """変換結果のバッファを使い回すテスト"""
+        processor = WhisperStreamProcessor()
+        
+        first = processor._bytes_to_float32(np.zeros(8, dtype=np.int16).tobytes())
+        second = processor._bytes_to_float32(np.full(4, 16384, dtype=np.int16).tobytes())
+        
+        assert second.dtype == np.float32
+        assert np.shares_memory(first, second)
+        np.testing.assert_array_equal(second, np.full(4, 0.5, dtype=np.float32))
+        
+    def test_bytes_to_float32_per_call_with_workers(self):
+        """num_workers が 2 以上のときは呼び出しごとに別の配列を返すテスト"""
+        processor = WhisperStreamProcessor(num_workers=2)
+        
+        first = processor._bytes_to_float32(np.zeros(8, dtype=np.int16).tobytes())
+        second = processor._bytes_to_float32(np.full(4, 16384, dtype=np.int16).tobytes())
+        
+        assert second.dtype == np.float32
+        assert not np.shares_memory(first, second)
+        np.testing.assert_array_equal(first, np.zeros(8, dtype=np.float32))
+        np.testing.assert_array_equal(second, np.full(4, 0.5, dtype=np.float32))
 
 
+@pytest.mark.noload
 class TestAudioAccumulator:
     """AudioAccumulator クラスのテスト"""
     
@@ -116,7 +264,8 @@ class TestAudioAccumulator:
         result = acc.add(b"\x00\x00" * 512, is_speech=False)
         
         assert result is not None
-        assert len(result) == len(chunk)
+        assert result.dtype == np.int16
+        assert result.tobytes() == chunk
         assert acc.is_accumulating is False
         
     def test_no_return_without_accumulation(self):
@@ -138,7 +287,7 @@ class TestAudioAccumulator:
         result = acc.flush()
         
         assert result is not None
-        assert len(result) == len(chunk)
+        assert result.nbytes == len(chunk)
         assert acc.is_accumulating is False
         
     def test_flush_empty(self):
@@ -168,7 +317,44 @@ class TestAudioAccumulator:
         result = acc.add(chunk, is_speech=True)
         
         assert result is not None
-        assert len(result) == len(chunk)
+        assert result.nbytes == len(chunk)
+        
+    def test_returned_audio_not_overwritten(self):
+        """返した音声は次の発話の蓄積で上書きされないテスト"""
+        acc = AudioAccumulator()
+        
+        acc.add(np.full(512, 1, dtype=np.int16), is_speech=True)
+        first = acc.add(np.zeros(512, dtype=np.int16), is_speech=False)
+        acc.add(np.full(512, 2, dtype=np.int16), is_speech=True)
+        
+        np.testing.assert_array_equal(first, np.full(512, 1, dtype=np.int16))
+        assert acc.duration_s == 512 / 16000
+        
+    def test_add_rejects_float_array(self):
+        """int16 以外の配列は蓄積せずにエラーにするテスト"""
+        accumulator = AudioAccumulator()
+        
+        with pytest.raises(TypeError):
+            accumulator.add(np.zeros(512, dtype=np.float32), is_speech=True)
+        assert accumulator.duration_s == 0.0
+        
+    def test_feed_with_vad(self):
+        """VAD 判定と蓄積を1回で行うテスト"""
+        acc = AudioAccumulator()
+        seen = []
+        
+        class FakeVAD:
+            def is_speech_float32(self, samples):
+                seen.append(samples.copy())
+                return len(seen) == 1
+                
+        chunk = np.full(512, 16384, dtype=np.int16)
+        
+        assert acc.feed_with_vad(chunk, FakeVAD()) is None
+        result = acc.feed_with_vad(np.zeros(512, dtype=np.int16), FakeVAD())
+        
+        np.testing.assert_array_equal(result, chunk)
+        np.testing.assert_array_almost_equal(seen[0], np.full(512, 0.5))
 
 
 if __name__ == "__main__":
@@ -2,6 +2,9 @@
 VAD モジュールのテスト
 """
 
+import sys
+from unittest.mock import MagicMock, patch
+
 import pytest
 import numpy as np
 
@@ -10,6 +13,17 @@ from src.vad.silero_vad import (
 )
 
 
+def _make_tone(freq_hz: float = 440, duration_s: float = 0.032, amplitude: float = 1.0,
+               sample_rate: int = 16000) -> np.ndarray:
+    """float32 のサイン波を生成する（float64 の中間配列を作らない）"""
+    phase = np.arange(int(duration_s * sample_rate), dtype=np.float32)
+    phase *= np.float32(2 * np.pi * freq_hz / sample_rate)
+    tone = np.sin(phase, out=phase)
+    tone *= np.float32(amplitude)
+    return tone
+
+
+@pytest.mark.noload
 class TestVADResult:
     """VADResult データクラスのテスト"""
     
@@ -25,6 +39,7 @@ class TestVADResult:
         assert result.state == VoiceState.SPEECH
 
 
+@pytest.mark.noload
 class TestVoiceState:
     """VoiceState Enum のテスト"""
     
@@ -34,6 +49,7 @@ class TestVoiceState:
         assert VoiceState.SPEECH.value == "speech"
 
 
+@pytest.mark.noload
 class TestSimpleEnergyVAD:
     """SimpleEnergyVAD クラスのテスト（Silero 不要）"""
     
@@ -70,10 +86,8 @@ class TestSimpleEnergyVAD:
             min_speech_duration_ms=0  # 即座に検出
         )
         
-        # 大きな音（サイン波）
-        t = np.linspace(0, 0.032, 512, endpoint=False)  # 32ms
-        frequency = 440
-        loud_sound = (np.sin(2 * np.pi * frequency * t) * 20000).astype(np.int16)
+        # 大きな音（32ms のサイン波）
+        loud_sound = _make_tone(amplitude=20000).astype(np.int16)
         
         result = vad.process(loud_sound.tobytes())
         
@@ -99,6 +113,59 @@ class TestSimpleEnergyVAD:
         
         silence = np.zeros(512, dtype=np.int16)
         assert vad.is_speech(silence.tobytes()) is False
+        
+    def test_float32_matches_bytes(self):
+        """float32 入力とバイト列入力で同じ判定になるテスト"""
+        loud = _make_tone(amplitude=20000).astype(np.int16)
+        
+        from_bytes = SimpleEnergyVAD(min_speech_duration_ms=0).process(loud.tobytes())
+        from_float = SimpleEnergyVAD(min_speech_duration_ms=0).process_float32(
+            loud.astype(np.float32) / 32768.0
+        )
+        
+        assert from_float.is_speech == from_bytes.is_speech
+        assert from_float.confidence == pytest.approx(from_bytes.confidence, abs=1e-5)
+        
+    def test_hysteresis_with_alternating_frames(self):
+        """音声・無音が交互のときの状態遷移テスト（開始 64ms・終了 32ms）"""
+        vad = SimpleEnergyVAD(min_speech_duration_ms=64, min_silence_duration_ms=32)
+        loud = _make_tone(amplitude=0.5)
+        quiet = np.zeros(512, dtype=np.float32)
+        
+        frames = [loud, quiet, loud, loud, quiet, loud]
+        states = [vad.is_speech_float32(frame) for frame in frames]
+        
+        assert states == [False, False, False, True, False, False]
+        
+    def test_process_accepts_int16_array(self):
+        """int16 配列を tobytes() せずにそのまま渡せるテスト"""
+        loud = _make_tone(amplitude=20000).astype(np.int16)
+        
+        from_array = SimpleEnergyVAD(min_speech_duration_ms=0).process(loud)
+        from_bytes = SimpleEnergyVAD(min_speech_duration_ms=0).process(loud.tobytes())
+        
+        assert from_array.is_speech is True
+        assert from_array.confidence == pytest.approx(from_bytes.confidence)
+        
+    def test_process_rejects_float_array(self):
+        """int16 以外の配列は int16 として再解釈せずにエラーにするテスト"""
+        vad = SimpleEnergyVAD()
+        
+        with pytest.raises(TypeError):
+            vad.process(np.zeros(512, dtype=np.float32))
+            
+    def test_is_speech_matches_process(self):
+        """判定のみの is_speech_float32 と process_float32 が dB の閾値どおりに判定するテスト"""
+        tone = _make_tone()
+        
+        # -40 dB の閾値は正弦波の振幅 0.01414 付近
+        for amplitude in (0.001, 0.01, 0.0141, 0.0142, 0.1):
+            samples = tone * np.float32(amplitude)
+            db = 10 * np.log10(np.mean(samples.astype(np.float64) ** 2))
+            expected = bool(db >= -40.0)
+            
+            assert SimpleEnergyVAD(min_speech_duration_ms=32).is_speech_float32(samples) == expected
+            assert SimpleEnergyVAD(min_speech_duration_ms=32).process_float32(samples).is_speech == expected
 
 
 class TestSileroVAD:
@@ -120,6 +187,45 @@ class TestSileroVAD:
         assert vad.threshold == 0.7
         assert vad.min_speech_duration_ms == 300
         
+    def test_min_duration_frames(self):
+        """持続時間の閾値をフレーム数（32ms 単位、切り上げ）に換算するテスト"""
+        vad = SileroVAD(min_speech_duration_ms=250, min_silence_duration_ms=64)
+        assert vad._min_speech_frames == 8
+        assert vad._min_silence_frames == 2
+        
+        vad = SileroVAD(min_speech_duration_ms=0)
+        assert vad._min_speech_frames == 0
+        
+    def test_init_model_path(self):
+        """ONNX モデルパス指定での初期化テスト（モデルロードなし）"""
+        vad = SileroVAD(model_path="silero_vad.int8.onnx")
+        assert vad.model_path == "silero_vad.int8.onnx"
+        assert vad._model is None
+        
+    def test_advance_hysteresis(self):
+        """複数フレームの確率で状態を進めるテスト（開始 2 フレーム・終了 1 フレーム）"""
+        vad = SileroVAD(threshold=0.5, min_speech_duration_ms=64, min_silence_duration_ms=32)
+        
+        flags = vad._advance([0.9, 0.9, 0.9, 0.1, 0.9])
+        
+        assert flags == [False, True, True, False, False]
+        assert vad.current_state == VoiceState.SILENCE
+        assert vad._speech_frames == 1
+        assert vad._silence_frames == 0
+        
+    def test_onnx_falls_back_to_torch(self):
+        """onnxruntime が無い場合は PyTorch のモデルを読み込むテスト"""
+        vad = SileroVAD(model_path="silero_vad.onnx")
+        jit_model = MagicMock()
+        
+        with patch.dict(sys.modules, {"onnxruntime": None}), \
+                patch("torch.hub.load", return_value=(jit_model, None)) as hub_load, \
+                patch("torch.set_num_threads"), patch("torch.set_num_interop_threads"):
+            vad._load_model()
+            
+        hub_load.assert_called_once()
+        assert vad._model is jit_model
+        
     def test_bytes_to_float(self):
         """バイト列変換テスト"""
         vad = SileroVAD()
@@ -128,8 +234,18 @@ class TestSileroVAD:
         samples = np.array([0, 16384, -16384, 32767, -32768], dtype=np.int16)
         result = vad._bytes_to_float(samples.tobytes())
         
+        # 1/32768 は 2 のべき乗なので、int16 の全範囲で float32 として厳密に表せる
         expected = np.array([0.0, 0.5, -0.5, 32767/32768, -1.0], dtype=np.float32)
-        np.testing.assert_array_almost_equal(result, expected, decimal=4)
+        np.testing.assert_array_equal(result, expected)
+        
+    def test_bytes_to_float_reuses_buffer(self):
+        """変換先の内部バッファを呼び出し間で再利用するテスト"""
+        vad = SileroVAD()
+        first = vad._bytes_to_float(np.full(1024, 16384, dtype=np.int16).tobytes())
+        second = vad._bytes_to_float(np.full(512, -16384, dtype=np.int16).tobytes())
+        
+        assert np.shares_memory(first, second)
+        np.testing.assert_array_equal(second, np.full(512, -0.5, dtype=np.float32))
         
     def test_reset(self):
         """リセットテスト"""
@@ -141,7 +257,67 @@ class TestSileroVAD:
         
         assert vad._state == VoiceState.SILENCE
         assert vad._speech_frames == 0
-        assert len(vad._buffer) == 0
+        assert vad._buffer_len == 0
+        
+    def test_process_frames_in_order(self):
+        """チャンク内のフレームを順に推論し、端数を持ち越すテスト（フェイクモデル）"""
+        torch = pytest.importorskip("torch")
+        vad = SileroVAD(min_speech_duration_ms=0)
+        frames = []
+        
+        def fake_model(frame, sample_rate):
+            frames.append(frame.numpy().copy())
+            return torch.tensor(0.9)
+            
+        vad._model = fake_model
+        samples = np.arange(1300, dtype=np.float32)
+        
+        results = vad.process_float32(samples)
+        
+        assert len(results) == 2
+        assert results[-1].is_speech is True
+        np.testing.assert_array_equal(frames[1], samples[512:1024])
+        np.testing.assert_array_equal(vad._buffer[:vad._buffer_len], samples[1024:])
+        
+        # 持ち越した端数は次のチャンクの先頭に連結される
+        vad.process_float32(np.zeros(300, dtype=np.float32))
+        np.testing.assert_array_equal(frames[2][:276], samples[1024:])
+        np.testing.assert_array_equal(frames[2][276:], np.zeros(236, dtype=np.float32))
+        assert vad._buffer_len == 64
+
+        
+    def test_process_events_only_transitions(self):
+        """状態が変化したフレームの結果だけを返すテスト（フェイクモデル）"""
+        torch = pytest.importorskip("torch")
+        vad = SileroVAD(min_speech_duration_ms=32, min_silence_duration_ms=32, silence_floor=0.0)
+        confidences = iter([0.1, 0.9, 0.9, 0.9, 0.1, 0.1])
+        vad._model = lambda frame, sample_rate: torch.tensor(next(confidences))
+        
+        events = vad.process_events_float32(np.zeros(512 * 6, dtype=np.float32))
+        
+        assert [e.state for e in events] == [VoiceState.SPEECH, VoiceState.SILENCE]
+        assert events[1].confidence == pytest.approx(0.1)
+        assert vad.current_state == VoiceState.SILENCE
+
+        
+    def test_silence_floor_skips_model(self):
+        """ピーク振幅が下限未満のフレームはモデルを呼ばずに確率 0 とするテスト"""
+        torch = pytest.importorskip("torch")
+        vad = SileroVAD()
+        calls = []
+        
+        def fake_model(frame, sample_rate):
+            calls.append(frame)
+            return torch.tensor(0.9)
+            
+        vad._model = fake_model
+        samples = np.zeros(1024, dtype=np.float32)
+        samples[600] = 0.5  # 2 フレーム目だけ音がある
+        
+        results = vad.process_float32(samples)
+        
+        assert len(calls) == 1
+        assert [r.confidence for r in results] == [0.0, pytest.approx(0.9)]
 
 
 if __name__ == "__main__":